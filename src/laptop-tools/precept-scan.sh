@@ -5,9 +5,11 @@
 #   precept-scan nmap <project> "<nmap args>"
 #   precept-scan iperf3 <project> "<iperf3 args>"
 #   precept-scan file <project> <description> <filepath>
+#   precept-scan dir <project> <description> <directory>
 #
 # Runs the scan, saves output to {project}/docs/network/YYYY-MM-DD-{type}-{desc}.txt,
 # SCPs to dev server, registers in SQLite via SSH, and git commits.
+# All files of one run are registered and committed in a single SSH call.
 #
 # Requires:
 #   - SSH key auth to dev server (10.0.10.21 or ssh.meter-tracker.com)
@@ -40,11 +42,13 @@ Usage:
   precept-scan nmap <project> "<nmap args>"
   precept-scan iperf3 <project> "<iperf3 args>"
   precept-scan file <project> <description> <filepath>
+  precept-scan dir <project> <description> <directory>
 
 Examples:
   precept-scan nmap fairfield-water "10.0.10.0/24"
   precept-scan iperf3 fairfield-water "-c 10.0.10.1 -t 30"
   precept-scan file fairfield-water wifi-survey /tmp/results.csv
+  precept-scan dir fairfield-water wifi-survey /tmp/survey/
 EOF
     exit 1
 }
@@ -105,22 +109,51 @@ case "$SCAN_TYPE" in
         DESC=$(safe_name "$1")
         SOURCE="$2"
         [[ -f "$SOURCE" ]] || die "File not found: $SOURCE"
-        EXT="${SOURCE##*.}"
-        OUTFILE="$NETWORK_DIR/${DATE}-${DESC}.${EXT}"
+        BASE=$(basename "$SOURCE")
+        OUTFILE="$NETWORK_DIR/${DATE}-${DESC}"
+        [[ "$BASE" == *.* ]] && OUTFILE="$OUTFILE.$(safe_name "${BASE##*.}")"
         cp "$SOURCE" "$OUTFILE"
         echo "Filed: $OUTFILE"
         ;;
 
+    dir)
+        [[ $# -lt 2 ]] && die "Usage: precept-scan dir <project> <description> <directory>"
+        DESC=$(safe_name "$1")
+        SOURCE_DIR="$2"
+        [[ -d "$SOURCE_DIR" ]] || die "Directory not found: $SOURCE_DIR"
+        OUTFILES=()
+        for SOURCE in "$SOURCE_DIR"/*; do
+            [[ -f "$SOURCE" ]] || continue
+            BASE=$(basename "$SOURCE")
+            OUTFILE="$NETWORK_DIR/${DATE}-${DESC}-$(safe_name "${BASE%.*}")"
+            [[ "$BASE" == *.* ]] && OUTFILE="$OUTFILE.$(safe_name "${BASE##*.}")"
+            cp "$SOURCE" "$OUTFILE"
+            OUTFILES+=("$OUTFILE")
+            echo "Filed: $OUTFILE"
+        done
+        [[ ${#OUTFILES[@]} -gt 0 ]] || die "No files in $SOURCE_DIR"
+        SCAN_TYPE="file"
+        ;;
+
     *)
-        die "Unknown scan type: $SCAN_TYPE (use nmap, iperf3, or file)"
+        die "Unknown scan type: $SCAN_TYPE (use nmap, iperf3, file, or dir)"
         ;;
 esac
 
+[[ -v OUTFILES ]] || OUTFILES=("$OUTFILE")
+NAMES=()
+for f in "${OUTFILES[@]}"; do NAMES+=("docs/network/$(basename "$f")"); done
+if [[ ${#NAMES[@]} -eq 1 ]]; then
+    COMMIT_MSG="Add ${SCAN_TYPE} scan: $(basename "${OUTFILES[0]}")"
+else
+    COMMIT_MSG="Add ${#NAMES[@]} ${SCAN_TYPE} files: ${DESC}"
+fi
+
 # Git commit locally
 if [[ -d "$PROJECT_DIR/.git" ]]; then
     cd "$PROJECT_DIR"
-    git add "docs/network/$(basename "$OUTFILE")"
-    git commit -m "Add ${SCAN_TYPE} scan: $(basename "$OUTFILE")" 2>/dev/null || true
+    git add "${NAMES[@]}"
+    git commit -m "$COMMIT_MSG" 2>/dev/null || true
     echo "Git committed."
 fi
 
@@ -128,14 +161,19 @@ fi
 REMOTE_PROJECT_DIR="$PROJECTS_DIR/$PROJECT"
 echo "Copying to dev server..."
 ssh "${SSH_OPTS[@]}" "$DEV_USER@$DEV_SERVER" "mkdir -p '$REMOTE_PROJECT_DIR/docs/network'" 2>/dev/null || true
-scp "${SSH_OPTS[@]}" "$OUTFILE" "$DEV_USER@$DEV_SERVER:$REMOTE_PROJECT_DIR/docs/network/" 2>/dev/null && echo "Copied." || echo "SCP failed (dev server unreachable?)."
+scp "${SSH_OPTS[@]}" "${OUTFILES[@]}" "$DEV_USER@$DEV_SERVER:$REMOTE_PROJECT_DIR/docs/network/" 2>/dev/null && echo "Copied." || echo "SCP failed (dev server unreachable?)."
 
-# Register in SQLite via SSH
+# Register in SQLite and git commit on dev server, in one SSH round trip.
+# Every part of a file name has been through safe_name and project names
+# are validated, so the JSON needs no escaping; the names are still quoted
+# for the remote shell.
+printf -v REMOTE_NAMES ' %q' "${NAMES[@]}"
 echo "Registering in database..."
-REMOTE_FILE="$REMOTE_PROJECT_DIR/docs/network/$(basename "$OUTFILE")"
-ssh "${SSH_OPTS[@]}" "$DEV_USER@$DEV_SERVER" "python3 ~/Projects/$REGISTER_SCRIPT '$PROJECT' '$SCAN_TYPE' '$REMOTE_FILE'" 2>/dev/null && echo "Registered." || echo "DB registration failed."
-
-# Git commit on dev server too
-ssh "${SSH_OPTS[@]}" "$DEV_USER@$DEV_SERVER" "cd '$REMOTE_PROJECT_DIR' && git add 'docs/network/$(basename "$OUTFILE")' && git commit -m 'Add ${SCAN_TYPE} scan: $(basename "$OUTFILE")'" 2>/dev/null || true
-
-echo "Done: $OUTFILE"
+for name in "${NAMES[@]}"; do
+    printf '{"project": "%s", "scan_type": "%s", "filepath": "%s"}\n' "$PROJECT" "$SCAN_TYPE" "$name"
+done | ssh "${SSH_OPTS[@]}" "$DEV_USER@$DEV_SERVER" \
+    "python3 ~/Projects/$REGISTER_SCRIPT --batch && echo 'Registered.' || echo 'DB registration failed.'; \
+     cd '$REMOTE_PROJECT_DIR' && git add --$REMOTE_NAMES && git commit -q -m '$COMMIT_MSG' || true" 2>/dev/null \
+    || echo "SSH to dev server failed."
+
+echo "Done: ${OUTFILES[*]}"
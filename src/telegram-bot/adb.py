@@ -0,0 +1,139 @@
+"""Async facade over db.py for use inside handlers.
+
+Every db.py function is run on a single dedicated DB thread so a slow commit
+or WAL checkpoint never blocks the event loop. db.py itself stays the sync
+API (register-scan.py and other scripts keep calling it directly).
+
+Also provides StallMonitor, which measures how long the event loop is
+blocked so the effect of moving DB work off-loop can be checked.
+"""
+
+import asyncio
+import functools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import db
+
+logger = logging.getLogger("precept-bot.adb")
+
+# One worker: all DB calls share that thread's pooled connection and are
+# applied in submission order.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precept-db")
+
+
+async def run(fn, *args, **kwargs):
+    """Run a sync callable on the DB thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(fn, *args, **kwargs)
+    )
+
+
+def _wrap(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def shutdown():
+    """Finish queued DB work, then close pooled connections."""
+    _executor.shutdown(wait=True)
+    db.close_all()
+
+
+# ---------------------------------------------------------------------------
+# Mirrors of db.py
+# ---------------------------------------------------------------------------
+
+init_db = _wrap(db.init_db)
+
+log_photo = _wrap(db.log_photo)
+log_voice = _wrap(db.log_voice)
+log_event = _wrap(db.log_event)
+flush_events = _wrap(db.flush_events)
+log_quick_note = _wrap(db.log_quick_note)
+
+start_visit = _wrap(db.start_visit)
+end_visit = _wrap(db.end_visit)
+get_active_visit = _wrap(db.get_active_visit)
+
+start_task = _wrap(db.start_task)
+end_task = _wrap(db.end_task)
+get_active_task = _wrap(db.get_active_task)
+
+log_scan = _wrap(db.log_scan)
+bulk_log_scans = _wrap(db.bulk_log_scans)
+get_scan_output = _wrap(db.get_scan_output)
+delete_scan = _wrap(db.delete_scan)
+
+search_transcripts = _wrap(db.search_transcripts)
+recent_activity = _wrap(db.recent_activity)
+visit_history = _wrap(db.visit_history)
+project_stats = _wrap(db.project_stats)
+project_usage = _wrap(db.project_usage)
+change_counter = _wrap(db.change_counter)
+rebuild_counters = _wrap(db.rebuild_counters)
+slow_queries = _wrap(db.slow_queries)
+
+visits_between = _wrap(db.visits_between)
+tasks_between = _wrap(db.tasks_between)
+
+archive_events = _wrap(db.archive_events)
+events_between = _wrap(db.events_between)
+count_events_between = _wrap(db.count_events_between)
+
+maintain = _wrap(db.maintain)
+
+
+# ---------------------------------------------------------------------------
+# Event-loop stall measurement
+# ---------------------------------------------------------------------------
+
+
+class StallMonitor:
+    """Sample event-loop lag by timing how late a short sleep wakes up."""
+
+    def __init__(self, interval: float = 0.05, window: int = 2000):
+        self.interval = interval
+        self.warn_ms = config.LOOP_STALL_WARN_MS
+        self._lags = deque(maxlen=window)
+        self.samples = 0
+        self.stalls = 0
+        self.max_ms = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - start - self.interval) * 1000)
+            self._record(lag_ms)
+
+    def _record(self, lag_ms: float):
+        self._lags.append(lag_ms)
+        self.samples += 1
+        self.max_ms = max(self.max_ms, lag_ms)
+        if lag_ms >= self.warn_ms:
+            self.stalls += 1
+            logger.warning("Event loop stalled for %.0f ms", lag_ms)
+
+    def snapshot(self) -> dict:
+        """Return lag percentiles over the recent window plus lifetime totals."""
+        lags = sorted(self._lags)
+        if not lags:
+            return {"samples": 0, "stalls": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "p50_ms": round(lags[len(lags) // 2], 1),
+            "p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+stall_monitor = StallMonitor()
@@ -0,0 +1,4 @@
+"""Benchmarks for the Precept Bot database layer.
+
+Run from src/telegram-bot, e.g. python3 -m bench.startup
+"""
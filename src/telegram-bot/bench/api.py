@@ -0,0 +1,264 @@
+"""Latency benchmark for the public db.py API on synthetic data.
+
+For each size preset (see bench.synth.SIZES) a scratch database is built and
+every public db function is called repeatedly, except the slow ones in ONCE
+and the setup helpers in SKIPPED. p50/p99 latencies are printed and written
+to JSON so runs can be compared across commits:
+    python3 -m bench.api [--sizes small,medium] [--iterations 200]
+                         [--out bench-results.json] [--compare old.json]
+"""
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+# Point config at a scratch location before db.py is imported
+_TMP = Path(tempfile.mkdtemp(prefix="precept-bench-"))
+os.environ["PRECEPT_DB_PATH"] = str(_TMP / "bench.db")
+
+import config  # noqa: E402
+import db  # noqa: E402
+from bench import synth  # noqa: E402
+
+
+def _cases(ctx: dict, rng: random.Random) -> dict:
+    """name -> (function, args factory). Factories run outside the timer."""
+    projects = ctx["projects"]
+    now = datetime.now()
+
+    def project():
+        return (rng.choice(projects),)
+
+    def open_visit():
+        return (db.start_visit(rng.choice(projects), "bench"),)
+
+    def open_task():
+        return (db.start_task(rng.choice(projects), "bench task"),)
+
+    def queued_events():
+        for _ in range(20):
+            db.log_event("bench", "detail", rng.choice(projects))
+        return ()
+
+    def week():
+        start = now - timedelta(days=rng.randrange(synth.SPAN_DAYS))
+        return (start, start + timedelta(days=7))
+
+    # Windows entirely in the hot table, and entirely in archive files
+    def hot_week():
+        start = now - timedelta(days=rng.randrange(7, config.EVENT_RETENTION_DAYS))
+        return (start, start + timedelta(days=7))
+
+    def archived_week():
+        start = now - timedelta(
+            days=rng.randrange(config.EVENT_RETENTION_DAYS + 7, synth.SPAN_DAYS)
+        )
+        return (start, start + timedelta(days=7))
+
+    def stale_events():
+        # Old enough for archive_events() to move on every call
+        when = (now - timedelta(days=config.EVENT_RETENTION_DAYS + 30)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO bot_events (event_type, detail, project, created_at) "
+                "VALUES ('bench', 'detail', ?, ?)",
+                [(rng.choice(projects), when) for _ in range(20)],
+            )
+        return (config.EVENT_RETENTION_DAYS,)
+
+    def logged_scan():
+        return (db.log_scan(rng.choice(projects), "nmap", "s.txt", "22/tcp open ssh\n" * 200),)
+
+    def scan_batch():
+        return (
+            [
+                {
+                    "project": rng.choice(projects),
+                    "scan_type": "nmap",
+                    "filepath": "s.txt",
+                    "raw_output": "22/tcp open ssh\n" * 200,
+                }
+                for _ in range(50)
+            ],
+        )
+
+    return {
+        "log_photo": (db.log_photo, lambda: (rng.choice(projects), "pics/bench.jpg", "bench")),
+        "log_voice": (db.log_voice, lambda: (rng.choice(projects), "v.md", "router cable patch panel")),
+        "log_quick_note": (db.log_quick_note, lambda: (rng.choice(projects), "checked the rack")),
+        "log_event": (db.log_event, lambda: ("bench", "detail", rng.choice(projects))),
+        "flush_events": (db.flush_events, queued_events),
+        "log_scan": (db.log_scan, lambda: (rng.choice(projects), "nmap", "s.txt", "22/tcp open ssh\n" * 200)),
+        "get_scan_output": (db.get_scan_output, lambda: (rng.randrange(1, 50),)),
+        "delete_scan": (db.delete_scan, logged_scan),
+        "start_visit": (db.start_visit, lambda: (rng.choice(projects), "bench")),
+        "end_visit": (db.end_visit, open_visit),
+        "get_active_visit": (db.get_active_visit, project),
+        "start_task": (db.start_task, lambda: (rng.choice(projects), "bench task")),
+        "end_task": (db.end_task, open_task),
+        "get_active_task": (db.get_active_task, project),
+        "bulk_log_scans": (db.bulk_log_scans, scan_batch),
+        # Voice notes and quick notes share the word list; scan output does not
+        "search_transcripts": (db.search_transcripts, lambda: (rng.choice(synth._WORDS),)),
+        "search_transcripts_scans": (
+            db.search_transcripts, lambda: (rng.choice(("nmap", "report", "8291", "554")),)
+        ),
+        "recent_activity": (db.recent_activity, lambda: (20,)),
+        "visit_history": (db.visit_history, project),
+        "visit_history_all": (db.visit_history, lambda: (None,)),
+        "project_stats": (db.project_stats, project),
+        "events_between": (db.events_between, week),
+        "events_between_hot": (db.events_between, hot_week),
+        "events_between_archived": (db.events_between, archived_week),
+        "count_events_between": (db.count_events_between, week),
+        "visits_between": (db.visits_between, week),
+        "tasks_between": (db.tasks_between, week),
+        "archive_events": (db.archive_events, stale_events),
+        "change_counter": (db.change_counter, tuple),
+        "project_usage": (db.project_usage, tuple),
+        "slow_queries": (db.slow_queries, lambda: (10,)),
+        "query_stats": (db.query_stats, tuple),
+        "reset_query_stats": (db.reset_query_stats, tuple),
+    }
+
+
+# Too slow to repeat; timed once per size after the cases
+ONCE = ("rebuild_counters", "maintain")
+
+# Public db functions deliberately not timed, and why
+SKIPPED = {
+    "init_db": "runs once per size to build the database",
+    "close_all": "connection teardown between sizes",
+    "configure": "selects the PRAGMA profile; closes connections",
+    "transaction": "context manager, timed through the functions run inside it",
+    "day_range": "date arithmetic, no database access",
+    "week_range": "date arithmetic, no database access",
+}
+
+
+def _untimed() -> list[str]:
+    """Public db functions neither benchmarked nor listed in SKIPPED."""
+    timed = {fn.__name__ for fn, _ in _cases({"projects": []}, random.Random()).values()}
+    public = {
+        name for name, obj in vars(db).items()
+        if inspect.isfunction(obj) and obj.__module__ == db.__name__ and not name.startswith("_")
+    }
+    return sorted(public - timed - set(ONCE) - set(SKIPPED))
+
+
+def _percentile(sorted_ms: list[float], q: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * q))]
+
+
+def run_size(size: str, iterations: int) -> dict:
+    """Build a database for one preset and time every case on it."""
+    config.DB_PATH = _TMP / f"bench-{size}.db"
+    config.EVENT_ARCHIVE_DIR = _TMP / f"archive-{size}"
+    db.close_all()
+    db.init_db()
+
+    start = time.perf_counter()
+    ctx = synth.generate(db._get_conn(), size)
+    # Archive old events as the nightly job does, so event reads span both
+    db.archive_events(config.EVENT_RETENTION_DAYS)
+    build_s = time.perf_counter() - start
+    print(f"[{size}] generated in {build_s:.1f}s", file=sys.stderr)
+
+    rng = random.Random(2)
+    results = {}
+    for name, (fn, make_args) in _cases(ctx, rng).items():
+        samples = []
+        for _ in range(iterations):
+            args = make_args()
+            t0 = time.perf_counter_ns()
+            fn(*args)
+            samples.append((time.perf_counter_ns() - t0) / 1e6)
+        samples.sort()
+        results[name] = {
+            "p50_ms": round(_percentile(samples, 0.50), 4),
+            "p99_ms": round(_percentile(samples, 0.99), 4),
+            "max_ms": round(samples[-1], 4),
+        }
+
+    once_args = {"rebuild_counters": (), "maintain": (config.DB_MAINTENANCE_BUDGET_SECONDS,)}
+    for name in ONCE:
+        t0 = time.perf_counter_ns()
+        getattr(db, name)(*once_args[name])
+        once = round((time.perf_counter_ns() - t0) / 1e6, 4)
+        results[name] = {"p50_ms": once, "p99_ms": once, "max_ms": once}
+
+    db.close_all()
+    return {"rows": synth.SIZES[size], "build_seconds": round(build_s, 1), "results": results}
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BOT_DIR, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(report: dict, baseline: dict | None):
+    for size, data in report["sizes"].items():
+        print(f"\n{size}:")
+        old = (baseline or {}).get("sizes", {}).get(size, {}).get("results", {})
+        for name, r in data["results"].items():
+            line = f"  {name:<24} p50 {r['p50_ms']:>9.3f} ms   p99 {r['p99_ms']:>9.3f} ms"
+            if name in old and old[name]["p50_ms"]:
+                line += f"   p50 x{r['p50_ms'] / old[name]['p50_ms']:.2f} vs {baseline.get('commit')}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    missing = _untimed()
+    if missing:
+        parser.error(f"no bench case or SKIPPED entry for: {', '.join(missing)}")
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "iterations": args.iterations,
+        "sizes": {},
+    }
+    try:
+        for size in args.sizes.split(","):
+            report["sizes"][size] = run_size(size, args.iterations)
+    finally:
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    Path(args.out).write_text(json.dumps(report, indent=2) + "\n")
+    _print_table(report, baseline)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
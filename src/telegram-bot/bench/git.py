@@ -0,0 +1,110 @@
+"""Capture-commit latency: `git add` + `git commit` vs the fast-import stream.
+
+Builds a scratch project repo holding N pictures, then times
+agit.commit_paths() for single-photo commits and for a 40-photo batch
+with each GIT_BACKEND:
+    python3 -m bench.git [--pictures 10000] [--size-kb 8] [--iterations 20]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+import agit  # noqa: E402
+import config  # noqa: E402
+
+BACKENDS = ("cli", "fast-import")
+BATCH = 40
+
+
+def build_repo(root: Path, pictures: int, size_kb: int) -> Path:
+    """A packed repo whose first commit holds `pictures` random files."""
+    repo = root / "project"
+    pics = repo / "pics"
+    pics.mkdir(parents=True)
+    for i in range(pictures):
+        (pics / f"2024-01-01-photo-{i:05d}.jpg").write_bytes(os.urandom(size_kb * 1024))
+    git = {"cwd": repo, "check": True, "capture_output": True}
+    subprocess.run(["git", "init", "-q"], **git)
+    subprocess.run(["git", "config", "user.name", "Precept Bench"], **git)
+    subprocess.run(["git", "config", "user.email", "bench@localhost"], **git)
+    subprocess.run(["git", "config", "gc.autoDetach", "false"], **git)
+    subprocess.run(["git", "add", "."], **git)
+    subprocess.run(["git", "commit", "-q", "-m", "Seed pictures"], **git)
+    # A repo that grew to this size would long since have been auto-packed
+    subprocess.run(["git", "repack", "-adq"], **git)
+    return repo
+
+
+async def time_commits(repo: Path, backend: str, iterations: int, size_kb: int) -> dict:
+    config.GIT_BACKEND = backend
+    pics = repo / "pics"
+
+    def new_photos(n):
+        paths = []
+        for _ in range(n):
+            path = pics / f"bench-{backend}-{time.perf_counter_ns()}.jpg"
+            path.write_bytes(os.urandom(size_kb * 1024))
+            paths.append(path)
+        return paths
+
+    single, batch = [], []
+    for i in range(iterations):
+        paths = new_photos(1)
+        t0 = time.perf_counter()
+        await agit.commit_paths(repo, paths, f"Add photo: {paths[0].name}")
+        single.append((time.perf_counter() - t0) * 1000)
+    for i in range(max(1, iterations // 4)):
+        paths = new_photos(BATCH)
+        t0 = time.perf_counter()
+        await agit.commit_paths(repo, paths, f"Add {BATCH} captures")
+        batch.append((time.perf_counter() - t0) * 1000)
+    await agit.close()
+
+    single.sort()
+    batch.sort()
+    return {
+        "single_p50_ms": round(single[len(single) // 2], 1),
+        "single_max_ms": round(single[-1], 1),
+        f"batch{BATCH}_p50_ms": round(batch[len(batch) // 2], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pictures", type=int, default=10_000)
+    parser.add_argument("--size-kb", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="precept-bench-git-"))
+    try:
+        start = time.perf_counter()
+        repo = build_repo(root, args.pictures, args.size_kb)
+        print(f"repo with {args.pictures} pictures built in {time.perf_counter() - start:.1f}s")
+        for backend in BACKENDS:
+            # Each backend starts from an identical copy of the seeded repo
+            copy = root / backend
+            shutil.copytree(repo, copy, symlinks=True)
+            result = asyncio.run(time_commits(copy, backend, args.iterations, args.size_kb))
+            print(f"  {backend:<12} " + "   ".join(f"{k} {v:>8}" for k, v in result.items()))
+            status = subprocess.run(
+                ["git", "status", "--porcelain"], cwd=copy, capture_output=True, text=True
+            ).stdout
+            if status:
+                print(f"  UNEXPECTED status after {backend}:\n{status}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""End-to-end startup benchmark for register-scan.py.
+
+precept-scan.sh runs register-scan.py over SSH for every scan, so its
+process start-up is on the critical path. This times fresh interpreter
+runs against a scratch database and fails if the median exceeds a budget:
+    python3 -m bench.startup [--runs 20] [--budget-ms 100]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPT = BOT_DIR / "register-scan.py"
+
+
+def _run(env: dict, filepath: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(SCRIPT), "bench", "nmap", filepath],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="precept-bench-"))
+    try:
+        scan_dir = tmpdir / "projects" / "bench" / "docs" / "network"
+        scan_dir.mkdir(parents=True)
+        scan_file = scan_dir / "scan.txt"
+        scan_file.write_text("Nmap scan report for 10.0.10.1\n22/tcp open ssh\n" * 50)
+
+        env = dict(
+            os.environ,
+            PRECEPT_DB_PATH=str(tmpdir / "bench.db"),
+            PROJECTS_DIR=str(tmpdir / "projects"),
+        )
+        filepath = "docs/network/scan.txt"
+
+        cold = _run(env, filepath)  # creates the database and migrates
+        times = [_run(env, filepath) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    median = statistics.median(times)
+    print(f"register-scan.py first run (migrations): {cold:.1f} ms")
+    print(
+        f"register-scan.py x{args.runs}: min {min(times):.1f} ms, "
+        f"median {median:.1f} ms, max {max(times):.1f} ms "
+        f"(budget {args.budget_ms:.0f} ms)"
+    )
+    if median > args.budget_ms:
+        print("FAIL: median over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Synthetic field data for database benchmarks.
+
+Fills a migrated database with projects, visits, captures and events spread
+over a few years, written with executemany so the triggers (FTS, counters)
+run just as they do for live data.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+# Row counts per preset; "large" is the one-million-event target
+SIZES = {
+    "small": dict(
+        projects=20, visits=100, photos=1_000, voice=500, notes=1_000,
+        scans=100, tasks=200, events=10_000,
+    ),
+    "medium": dict(
+        projects=60, visits=1_000, photos=10_000, voice=5_000, notes=10_000,
+        scans=1_000, tasks=2_000, events=100_000,
+    ),
+    "large": dict(
+        projects=200, visits=10_000, photos=100_000, voice=50_000, notes=100_000,
+        scans=5_000, tasks=20_000, events=1_000_000,
+    ),
+}
+
+SPAN_DAYS = 3 * 365
+
+_WORDS = (
+    "router switch cable patch panel rack fibre ups battery access point ssid "
+    "vlan firewall camera nvr dvr poe injector cupboard ceiling roof mast "
+    "signal strength channel interference client laptop printer server "
+    "replaced installed tested labelled faulty quote invoice follow up "
+    "meeting site manager owner office warehouse gate borehole pump meter"
+).split()
+
+_EVENT_TYPES = (
+    "photo_saved", "voice_saved", "quick_note", "project_switched",
+    "document_saved", "task_started", "task_ended", "scan_logged",
+)
+
+
+def _ts(rng: random.Random, now: datetime) -> str:
+    moment = now - timedelta(seconds=rng.randrange(SPAN_DAYS * 86400))
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _scan_output(rng: random.Random) -> str:
+    net = f"10.0.{rng.randrange(256)}"
+    lines = [f"Nmap scan report for {net}.0/24"]
+    for host in rng.sample(range(1, 255), rng.randrange(5, 40)):
+        lines.append(f"Nmap scan report for {net}.{host}")
+        for port in rng.sample((22, 53, 80, 443, 554, 8080, 8291), rng.randrange(1, 4)):
+            lines.append(f"{port}/tcp open")
+    return "\n".join(lines)
+
+
+def project_names(count: int) -> list[str]:
+    return [f"client-{i:03d}" for i in range(count)]
+
+
+def generate(conn, size: str, seed: int = 1) -> dict:
+    """Populate conn (a migrated database) with the preset row counts."""
+    import db
+
+    counts = SIZES[size]
+    rng = random.Random(seed)
+    now = datetime.now()
+    projects = project_names(counts["projects"])
+
+    with conn:
+        visits = []
+        for _ in range(counts["visits"]):
+            start = _ts(rng, now)
+            visits.append((rng.choice(projects), f"Site {rng.randrange(100)}", start, start))
+        conn.executemany(
+            "INSERT INTO site_visits (project, location, started_at, ended_at) "
+            "VALUES (?, ?, ?, ?)",
+            visits,
+        )
+        visit_ids = [r[0] for r in conn.execute("SELECT id FROM site_visits")]
+
+        def visit():
+            return rng.choice(visit_ids) if rng.random() < 0.5 else None
+
+        conn.executemany(
+            "INSERT INTO photos (project, filepath, caption, visit_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (rng.choice(projects), f"pics/{i}.jpg", _sentence(rng, 3), visit(), _ts(rng, now))
+                for i in range(counts["photos"])
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO voice_notes (project, filepath, transcript, visit_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (rng.choice(projects), f"correspondence/{i}.md", _sentence(rng, 60), visit(), _ts(rng, now))
+                for i in range(counts["voice"])
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO quick_notes (project, text, visit_id, created_at) VALUES (?, ?, ?, ?)",
+            (
+                (rng.choice(projects), _sentence(rng, 12), visit(), _ts(rng, now))
+                for _ in range(counts["notes"])
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tasks (project, description, started_at, ended_at, "
+            "duration_minutes, visit_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (rng.choice(projects), _sentence(rng, 4), ts, ts, rng.uniform(5, 240), visit())
+                for ts in (_ts(rng, now) for _ in range(counts["tasks"]))
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO bot_events (event_type, detail, project, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                (rng.choice(_EVENT_TYPES), _sentence(rng, 5), rng.choice(projects), _ts(rng, now))
+                for _ in range(counts["events"])
+            ),
+        )
+
+    # Scans go through the API so output is stored the way live data is
+    for i in range(counts["scans"]):
+        db.log_scan(rng.choice(projects), "nmap", f"docs/network/{i}.txt", _scan_output(rng), visit())
+    db.flush_events()
+
+    return {"projects": projects, "visit_ids": visit_ids}
@@ -5,6 +5,8 @@ Runs on the dev server (10.0.10.21) as a systemd user service.
 Single-user bot: silently ignores messages from unauthorized users.
 """
 
+import asyncio
+import functools
 import logging
 from collections import defaultdict
 from datetime import datetime, time as dt_time, timedelta
@@ -19,9 +21,14 @@ from telegram.ext import (
     filters,
 )
 
+import adb
+import agit
+import catalog
 import config
 import db
+import gitqueue
 import handlers
+import journal
 import menus
 
 logging.basicConfig(
@@ -94,6 +101,76 @@ def setup_reminders(app):
     logger.info("Daily reminders scheduled (07:30 + 16:30 SAST)")
 
 
+def setup_db_jobs(app):
+    """Schedule periodic database and git housekeeping jobs."""
+    job_queue = app.job_queue
+
+    # Bound the write-behind loss window even when no new events arrive
+    if config.EVENT_FLUSH_SECONDS > 0:
+        job_queue.run_repeating(
+            handlers.flush_event_log,
+            interval=config.EVENT_FLUSH_SECONDS,
+            name="flush_event_log",
+        )
+
+    # Quick notes are fsynced in the background between notes too
+    if config.JOURNAL_FSYNC == "interval":
+        job_queue.run_repeating(
+            handlers.sync_journal,
+            interval=config.JOURNAL_FSYNC_SECONDS,
+            name="sync_journal",
+        )
+
+    # Keep the hot database small: archive old events nightly at 03:00 SAST
+    job_queue.run_daily(
+        handlers.archive_old_events,
+        time=dt_time(3, 0, tzinfo=config.TIMEZONE),
+        name="archive_old_events",
+    )
+
+    # Then shrink the WAL and freelist it leaves behind, at 03:30 SAST
+    job_queue.run_daily(
+        handlers.db_maintenance,
+        time=dt_time(3, 30, tzinfo=config.TIMEZONE),
+        name="db_maintenance",
+    )
+
+    # And keep the project repos packed, at 03:45 SAST
+    job_queue.run_daily(
+        handlers.git_maintenance,
+        time=dt_time(3, 45, tzinfo=config.TIMEZONE),
+        name="git_maintenance",
+    )
+
+
+async def on_startup(app):
+    """Start background monitors once the event loop is running."""
+    gitqueue.commits.notify = functools.partial(handlers.report_commit, app.bot)
+    app.bot_data["stall_monitor_task"] = asyncio.create_task(
+        adb.stall_monitor.run()
+    )
+    catalog.catalog.watch()
+    catalog.catalog.load_usage(await adb.project_usage())
+    app.bot_data["usage_task"] = asyncio.create_task(catalog.catalog.refresh_usage())
+
+
+async def on_shutdown(app):
+    """Stop monitors, commit queued captures, close note files and DB connections."""
+    task = app.bot_data.pop("stall_monitor_task", None)
+    if task:
+        task.cancel()
+    task = app.bot_data.pop("usage_task", None)
+    if task:
+        task.cancel()
+    catalog.catalog.unwatch()
+    logger.info("Event loop lag at shutdown: %s", adb.stall_monitor.snapshot())
+    gitqueue.commits.notify = None
+    await gitqueue.commits.flush()
+    await agit.close()
+    journal.notes.close()
+    adb.shutdown()
+
+
 def main():
     config.validate()
 
@@ -107,7 +184,13 @@ def main():
         config.DB_PATH,
     )
 
-    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # The ConversationHandler manages all state transitions
     conv = ConversationHandler(
@@ -135,6 +218,7 @@ def main():
                 CommandHandler("recent", handlers.cmd_recent, AUTH),
                 CommandHandler("visits", handlers.cmd_visits, AUTH),
                 CommandHandler("reminders", handlers.cmd_reminders, AUTH),
+                CommandHandler("perf", handlers.cmd_perf, AUTH),
                 CommandHandler("cancel", handlers.cancel, AUTH),
                 # Media handlers
                 MessageHandler(AUTH & filters.PHOTO, handlers.handle_photo),
@@ -196,6 +280,7 @@ def main():
     app.add_handler(conv)
 
     setup_reminders(app)
+    setup_db_jobs(app)
 
     app.run_polling(allowed_updates=Update.ALL_TYPES)
 
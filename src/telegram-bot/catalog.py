@@ -0,0 +1,308 @@
+"""In-memory catalog of the project directories under PROJECTS_DIR.
+
+Project pickers and name matching read the catalog instead of listing
+PROJECTS_DIR on every tap. The listing is rebuilt only after PROJECTS_DIR
+itself changes: an inotify watch flags that (Linux), and elsewhere each
+read compares the directory's mtime with the one seen at the last build.
+
+Each entry carries metadata for menus: whether the project is a git repo,
+when it last had activity and how much disk it uses. Captures report
+activity through touch(); disk usage is measured off the event loop by
+refresh_usage() at startup and nightly.
+
+The picker order comes from how often and how recently each project was
+selected (the project_usage table, loaded at startup and updated through
+record_use()). The ranked list is kept until a selection or a rebuild
+changes it, so paging through the picker never re-sorts.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import math
+import os
+import struct
+import time
+from pathlib import Path
+
+import config
+import fuzzy
+
+logger = logging.getLogger("precept-bot.catalog")
+
+# A selection counts half as much towards picker order after this long
+USAGE_HALF_LIFE_DAYS = 7
+
+
+class Project:
+    """One project directory and what the menus need to know about it."""
+
+    __slots__ = ("name", "path", "is_git", "last_activity", "disk_bytes")
+
+    def __init__(self, path: Path, is_git: bool, last_activity: float):
+        self.name = path.name
+        self.path = path
+        self.is_git = is_git
+        self.last_activity = last_activity
+        self.disk_bytes: int | None = None  # until refresh_usage() has run
+
+    def __repr__(self):
+        return f"Project({self.name!r}, git={self.is_git})"
+
+
+def _scan(root: Path) -> dict[str, Project]:
+    projects = {}
+    for entry in os.scandir(root):
+        if entry.name.startswith(".") or not entry.is_dir():
+            continue
+        path = Path(entry.path)
+        try:
+            # Every commit rewrites the index; fall back to the directory itself
+            activity = (path / ".git" / "index").stat().st_mtime
+            is_git = True
+        except OSError:
+            activity = entry.stat().st_mtime
+            is_git = (path / ".git").is_dir()
+        projects[entry.name] = Project(path, is_git, activity)
+    return projects
+
+
+def _disk_usage(path: Path) -> int:
+    """Bytes used by files under path, not following symlinks (blocking)."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+# ---------------------------------------------------------------------------
+# inotify (Linux only, via libc)
+# ---------------------------------------------------------------------------
+
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+
+
+def _inotify_watch(root: Path) -> int | None:
+    """An inotify fd watching root's entries, or None where unsupported."""
+    name = ctypes.util.find_library("c")
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    fd = init(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        return None
+    if add_watch(fd, os.fsencode(root), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class Catalog:
+    """Project directories under root, rebuilt only when root changes."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._projects: dict[str, Project] = {}
+        self._names: list[str] = []
+        self._index: fuzzy.TrigramIndex | None = None
+        self._usage: dict[str, tuple[int, float]] = {}  # name -> (uses, last use)
+        self._ranked: list[str] | None = None
+        self._mtime: float | None = None
+        self._fd: int | None = None  # inotify fd while watching
+        self._dirty = True
+
+    # -- Reads --------------------------------------------------------------
+
+    def _current(self) -> dict[str, Project]:
+        if self._fd is None and not self._dirty:
+            # No watch: one stat tells whether entries were added or removed
+            try:
+                self._dirty = self.root.stat().st_mtime != self._mtime
+            except OSError:
+                self._dirty = True
+        if self._dirty:
+            self._rebuild()
+        return self._projects
+
+    def _rebuild(self):
+        start = time.perf_counter()
+        try:
+            mtime = self.root.stat().st_mtime
+            projects = _scan(self.root)
+        except OSError as exc:
+            logger.warning("Cannot list %s: %s", self.root, exc)
+            mtime, projects = None, {}
+        # Keep measured disk usage for projects that are still there
+        for name, project in projects.items():
+            old = self._projects.get(name)
+            if old is not None:
+                project.disk_bytes = old.disk_bytes
+        self._projects = projects
+        self._names = sorted(projects)
+        self._index = None
+        self._ranked = None
+        self._mtime = mtime
+        self._dirty = False
+        logger.debug(
+            "Project catalog rebuilt: %d projects in %.1f ms",
+            len(projects), (time.perf_counter() - start) * 1000,
+        )
+
+    def names(self) -> list[str]:
+        """Project names, sorted. Callers must not modify the list."""
+        self._current()
+        return self._names
+
+    def get(self, name: str) -> Project | None:
+        return self._current().get(name)
+
+    def projects(self) -> list[Project]:
+        """All projects in name order."""
+        projects = self._current()
+        return [projects[name] for name in self._names]
+
+    def _trigram_index(self) -> fuzzy.TrigramIndex:
+        self._current()
+        if self._index is None:
+            self._index = fuzzy.TrigramIndex(self._names)
+        return self._index
+
+    def match(self, query: str) -> str | None:
+        """The project query names exactly (ignoring case), or the only one
+        whose name contains it; None when that is ambiguous or absent."""
+        names = self._trigram_index().containing(query)
+        query_lower = query.lower()
+        for name in names:
+            if name.lower() == query_lower:
+                return name
+        return names[0] if len(names) == 1 else None
+
+    def search(self, query: str, k: int = 5) -> list[str]:
+        """Up to k project names best matching query, favouring recent use."""
+        index = self._trigram_index()
+        projects = self._projects
+        usage = self._usage
+        matches = index.search(
+            query,
+            k,
+            last_used=lambda name: max(
+                projects[name].last_activity, usage.get(name, (0, 0))[1]
+            ),
+        )
+        return [name for name, _ in matches]
+
+    def ranked(self) -> list[str]:
+        """Project names, most used first. Callers must not modify the list.
+
+        Selections count for less as they age (USAGE_HALF_LIFE_DAYS); never
+        selected projects follow in name order.
+        """
+        self._current()
+        if self._ranked is None:
+            now = time.time()
+            decay = math.log(2) / (USAGE_HALF_LIFE_DAYS * 86400)
+
+            def score(name):
+                uses, last = self._usage.get(name, (0, 0))
+                if not uses:
+                    return 0.0
+                return (1 + math.log2(uses)) * math.exp(-decay * max(0.0, now - last))
+
+            # sorted() is stable, so ties keep name order
+            self._ranked = sorted(self._names, key=score, reverse=True)
+        return self._ranked
+
+    # -- Updates ------------------------------------------------------------
+
+    def invalidate(self):
+        """Rebuild on the next read (e.g. right after creating a project)."""
+        self._dirty = True
+
+    def load_usage(self, usage: dict[str, tuple[int, float]]):
+        """Seed picker order from db.project_usage()."""
+        self._usage = dict(usage)
+        self._ranked = None
+
+    def record_use(self, name: str):
+        """Count a selection of name (the DB keeps its own copy)."""
+        uses, _ = self._usage.get(name, (0, 0))
+        self._usage[name] = (uses + 1, time.time())
+        self._ranked = None
+
+    def touch(self, name: str, nbytes: int = 0):
+        """Record activity in a project, plus nbytes written to it."""
+        project = self.get(name)
+        if project is None:
+            return
+        project.last_activity = time.time()
+        if project.disk_bytes is not None:
+            project.disk_bytes += nbytes
+
+    async def refresh_usage(self):
+        """Measure every project's disk usage in a worker thread."""
+        start = time.perf_counter()
+        for project in self.projects():
+            project.disk_bytes = await asyncio.to_thread(_disk_usage, project.path)
+        logger.info(
+            "Project disk usage measured in %.1fs", time.perf_counter() - start
+        )
+
+    # -- inotify ------------------------------------------------------------
+
+    def watch(self):
+        """Start invalidating from inotify events (needs a running loop).
+
+        Without inotify the mtime check on each read stays in place.
+        """
+        fd = _inotify_watch(self.root)
+        if fd is None:
+            logger.info("inotify unavailable; project catalog checks mtime instead")
+            return
+        self._fd = fd
+        self._dirty = True
+        asyncio.get_running_loop().add_reader(fd, self._on_events)
+
+    def _on_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = struct.unpack_from("iIII", data, offset)
+            offset += 16 + length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # The watch is gone with the directory; fall back to mtime
+                self.unwatch()
+                break
+        self._dirty = True
+
+    def unwatch(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(fd)
+            except RuntimeError:
+                pass
+            os.close(fd)
+        self._dirty = True
+
+
+catalog = Catalog(config.PROJECTS_DIR)
@@ -8,8 +8,6 @@ import os
 import sys
 from pathlib import Path
 
-import pytz
-
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 ALLOWED_USER_ID = int(os.environ.get("ALLOWED_USER_ID", "0"))
@@ -21,14 +19,92 @@ DB_PATH = Path(
     os.environ.get("PRECEPT_DB_PATH", str(Path.home() / ".config/precept/precept.db"))
 )
 
+# SQLite PRAGMA profile (see db.PRAGMA_PROFILES): bot, cli, durable
+DB_PROFILE = os.environ.get("PRECEPT_DB_PROFILE", "bot")
+
+# bot_events older than this move to monthly archive files
+# (precept-events-YYYY-MM.db) in EVENT_ARCHIVE_DIR
+EVENT_RETENTION_DAYS = int(os.environ.get("PRECEPT_EVENT_RETENTION_DAYS", "90"))
+EVENT_ARCHIVE_DIR = Path(
+    os.environ.get("PRECEPT_EVENT_ARCHIVE_DIR", str(DB_PATH.parent / "archive"))
+)
+
+# Statements slower than this (ms) are logged to the slow_queries table
+SLOW_QUERY_MS = float(os.environ.get("PRECEPT_SLOW_QUERY_MS", "50"))
+
+# bot_events write-behind: flush after this many events or seconds.
+# Bounds how many audit events a crash can lose; 0 seconds writes through.
+EVENT_BATCH_SIZE = int(os.environ.get("PRECEPT_EVENT_BATCH_SIZE", "50"))
+EVENT_FLUSH_SECONDS = float(os.environ.get("PRECEPT_EVENT_FLUSH_SECONDS", "5"))
+
+# Nightly SQLite maintenance (optimize, checkpoint, incremental vacuum)
+# stops starting new work after this many seconds. A database created
+# before incremental vacuum needs one full VACUUM first, which is skipped
+# until it fits in this budget (see deploy/README.md)
+DB_MAINTENANCE_BUDGET_SECONDS = float(
+    os.environ.get("PRECEPT_DB_MAINTENANCE_BUDGET_SECONDS", "30")
+)
+
+# Captures are committed to the project repo in batches: a batch is
+# committed once no new file has arrived for the debounce window, or at the
+# latest this long after its first file
+GIT_COMMIT_DEBOUNCE_SECONDS = float(os.environ.get("PRECEPT_GIT_COMMIT_DEBOUNCE_SECONDS", "10"))
+GIT_COMMIT_MAX_DELAY_SECONDS = float(os.environ.get("PRECEPT_GIT_COMMIT_MAX_DELAY_SECONDS", "60"))
+
+# Async git driver (agit.py): per-command timeout and the most git
+# processes run at once across all projects
+GIT_TIMEOUT_SECONDS = float(os.environ.get("PRECEPT_GIT_TIMEOUT_SECONDS", "120"))
+GIT_MAX_PARALLEL = int(os.environ.get("PRECEPT_GIT_MAX_PARALLEL", "4"))
+# "cli" (git add + commit) or "fast-import" (one long-lived stream per
+# repo; see agit.py and `python3 -m bench.git` before switching)
+GIT_BACKEND = os.environ.get("PRECEPT_GIT_BACKEND", "cli")
+
+# Quick-note journal (journal.py) durability: "always" fsyncs every note,
+# "interval" at most every JOURNAL_FSYNC_SECONDS, "never" leaves it to the OS.
+# Notes reach the file (and the next git commit) immediately in every mode.
+JOURNAL_FSYNC = os.environ.get("PRECEPT_JOURNAL_FSYNC", "interval")
+JOURNAL_FSYNC_SECONDS = float(os.environ.get("PRECEPT_JOURNAL_FSYNC_SECONDS", "5"))
+
+# Nightly git maintenance of the project repos (gitmaint.py) stops
+# starting new repos after this many seconds
+GIT_MAINTENANCE_BUDGET_SECONDS = float(
+    os.environ.get("PRECEPT_GIT_MAINTENANCE_BUDGET_SECONDS", "300")
+)
+
+# Content-addressed store for captured media, outside the project repos.
+# When set, photos under pics/ and files of at least MEDIA_STORE_MIN_BYTES
+# under docs/ in projects opted in with media-migrate.py are moved there
+# and git tracks a symlink instead (see mediastore.py). Unset keeps media
+# in git.
+MEDIA_STORE_DIR = (
+    Path(os.environ["PRECEPT_MEDIA_STORE_DIR"]).expanduser()
+    if os.environ.get("PRECEPT_MEDIA_STORE_DIR")
+    else None
+)
+MEDIA_STORE_MIN_BYTES = int(os.environ.get("PRECEPT_MEDIA_STORE_MIN_BYTES", str(1024 * 1024)))
+
+# Event-loop lag (ms) logged as a stall by adb.StallMonitor
+LOOP_STALL_WARN_MS = int(os.environ.get("PRECEPT_LOOP_STALL_WARN_MS", "100"))
+
 # Telegram message length limit
 MAX_MESSAGE_LENGTH = 4096
 
 # Date format used in filenames
 DATE_FORMAT = "%Y-%m-%d"
 
-# Timezone -- SAST (UTC+2), no DST
-TIMEZONE = pytz.timezone("Africa/Johannesburg")
+# Timezone -- SAST (UTC+2), no DST. Resolved on first access (see
+# __getattr__) so scripts like register-scan.py don't pay for pytz.
+TIMEZONE_NAME = "Africa/Johannesburg"
+
+
+def __getattr__(name):
+    if name == "TIMEZONE":
+        import pytz
+
+        tz = pytz.timezone(TIMEZONE_NAME)
+        globals()["TIMEZONE"] = tz
+        return tz
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def validate():
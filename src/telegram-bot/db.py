@@ -1,22 +1,314 @@
 """SQLite database for Precept Bot -- persistent logging and state.
 
 Database at ~/.config/precept/precept.db (auto-created on first startup).
-Migrations are numbered SQL blocks applied in order.
+Migrations are numbered SQL blocks (or Python steps) applied in order.
+Requires an SQLite build with FTS5 (standard in CPython's bundled sqlite3).
 """
 
 import logging
+import re
 import sqlite3
-from datetime import datetime, timedelta
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, time as dtime, timedelta
+from itertools import islice
 from pathlib import Path
 
 import config
 
 logger = logging.getLogger("precept-bot.db")
 
+# ---------------------------------------------------------------------------
+# Compressed scan output
+# ---------------------------------------------------------------------------
+
+# network_scans.raw_output is stored compressed in scan_outputs. zlib is
+# used because it ships with Python; the codec column leaves room for others.
+SCAN_CODEC = "zlib"
+SCAN_BACKFILL_CHUNK = 200
+
+
+def _compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _inflate(codec: str | None, data: bytes | None) -> str | None:
+    """Decompress a scan_outputs blob. Registered as SQL precept_inflate()."""
+    if data is None:
+        return None
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "raw":
+        return bytes(data).decode("utf-8")
+    raise ValueError(f"Unknown scan output codec: {codec}")
+
+
 # ---------------------------------------------------------------------------
 # Migrations
 # ---------------------------------------------------------------------------
 
+# Recompute project_counters and visit_counters from the source tables.
+# Used by migration 5 to backfill and by rebuild_counters().
+REBUILD_COUNTERS_SQL = """
+    DELETE FROM project_counters;
+    INSERT INTO project_counters
+        (project, photos, voice_notes, visits, scans, quick_notes, task_minutes)
+    SELECT project, SUM(a), SUM(b), SUM(c), SUM(d), SUM(e), SUM(f) FROM (
+        SELECT project, COUNT(*) AS a, 0 AS b, 0 AS c, 0 AS d, 0 AS e, 0 AS f
+            FROM photos GROUP BY project
+        UNION ALL SELECT project, 0, COUNT(*), 0, 0, 0, 0
+            FROM voice_notes GROUP BY project
+        UNION ALL SELECT project, 0, 0, COUNT(*), 0, 0, 0
+            FROM site_visits GROUP BY project
+        UNION ALL SELECT project, 0, 0, 0, COUNT(*), 0, 0
+            FROM network_scans GROUP BY project
+        UNION ALL SELECT project, 0, 0, 0, 0, COUNT(*), 0
+            FROM quick_notes GROUP BY project
+        UNION ALL SELECT project, 0, 0, 0, 0, 0, COALESCE(SUM(duration_minutes), 0)
+            FROM tasks WHERE ended_at IS NOT NULL GROUP BY project
+    ) GROUP BY project;
+
+    DELETE FROM visit_counters;
+    INSERT INTO visit_counters (visit_id, photos, voice_notes, quick_notes, tasks, scans)
+    SELECT visit_id, SUM(a), SUM(b), SUM(c), SUM(d), SUM(e) FROM (
+        SELECT visit_id, COUNT(*) AS a, 0 AS b, 0 AS c, 0 AS d, 0 AS e
+            FROM photos WHERE visit_id IS NOT NULL GROUP BY visit_id
+        UNION ALL SELECT visit_id, 0, COUNT(*), 0, 0, 0
+            FROM voice_notes WHERE visit_id IS NOT NULL GROUP BY visit_id
+        UNION ALL SELECT visit_id, 0, 0, COUNT(*), 0, 0
+            FROM quick_notes WHERE visit_id IS NOT NULL GROUP BY visit_id
+        UNION ALL SELECT visit_id, 0, 0, 0, COUNT(*), 0
+            FROM tasks WHERE visit_id IS NOT NULL GROUP BY visit_id
+        UNION ALL SELECT visit_id, 0, 0, 0, 0, COUNT(*)
+            FROM network_scans WHERE visit_id IS NOT NULL GROUP BY visit_id
+    ) GROUP BY visit_id;
+"""
+
+
+def _counter_triggers(
+    table: str, project_col: str | None, visit_col: str | None
+) -> str:
+    """SQL for triggers that keep the counter tables in step with a table.
+
+    project_col/visit_col name the column to bump in project_counters and
+    visit_counters; None skips that side.
+    """
+    inc, dec = [], []
+    if project_col:
+        inc.append(
+            f"INSERT INTO project_counters (project, {project_col}) "
+            f"VALUES (new.project, 1) "
+            f"ON CONFLICT (project) DO UPDATE SET {project_col} = {project_col} + 1;"
+        )
+        dec.append(
+            f"UPDATE project_counters SET {project_col} = {project_col} - 1 "
+            f"WHERE project = old.project;"
+        )
+    if visit_col:
+        inc.append(
+            f"INSERT INTO visit_counters (visit_id, {visit_col}) "
+            f"SELECT new.visit_id, 1 WHERE new.visit_id IS NOT NULL "
+            f"ON CONFLICT (visit_id) DO UPDATE SET {visit_col} = {visit_col} + 1;"
+        )
+        dec.append(
+            f"UPDATE visit_counters SET {visit_col} = {visit_col} - 1 "
+            f"WHERE visit_id = old.visit_id;"
+        )
+    cols = ", ".join(c for c, on in (("project", project_col), ("visit_id", visit_col)) if on)
+    inc_sql, dec_sql = "\n        ".join(inc), "\n        ".join(dec)
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_counters_ai AFTER INSERT ON {table} BEGIN
+        {inc_sql}
+    END;
+    CREATE TRIGGER IF NOT EXISTS {table}_counters_ad AFTER DELETE ON {table} BEGIN
+        {dec_sql}
+    END;
+    CREATE TRIGGER IF NOT EXISTS {table}_counters_au AFTER UPDATE OF {cols} ON {table} BEGIN
+        {dec_sql}
+        {inc_sql}
+    END;
+    """
+
+
+def _epoch_columns(table: str, columns: dict[str, str]) -> str:
+    """SQL adding indexed integer UTC epoch twins of localtime TEXT columns.
+
+    columns maps each TEXT column to its epoch column. Triggers fill the
+    epoch columns when a writer leaves them NULL or changes the TEXT column;
+    the log_* writers set created_ts themselves, so the insert trigger
+    only backfills rows from older code.
+    """
+    def epoch(col):
+        return f"CAST(strftime('%s', {col}, 'utc') AS INTEGER)"
+
+    first = next(iter(columns.values()))
+    sets = ", ".join(f"{ts} = {epoch('new.' + text)}" for text, ts in columns.items())
+    parts = []
+    for text, ts in columns.items():
+        parts.append(f"ALTER TABLE {table} ADD COLUMN {ts} INTEGER;")
+        parts.append(f"UPDATE {table} SET {ts} = {epoch(text)};")
+    parts.append(f"CREATE INDEX IF NOT EXISTS idx_{table}_{first} ON {table} ({first});")
+    return "\n    ".join(parts) + f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_epoch_ai AFTER INSERT ON {table}
+    WHEN new.{first} IS NULL BEGIN
+        UPDATE {table} SET {sets} WHERE id = new.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS {table}_epoch_au
+    AFTER UPDATE OF {", ".join(columns)} ON {table} BEGIN
+        UPDATE {table} SET {sets} WHERE id = new.id;
+    END;
+    """
+
+
+def _migrate_scan_outputs(conn: sqlite3.Connection):
+    """Migration 6: move raw scan output into compressed scan_outputs rows.
+
+    Existing rows are compressed in chunks, each committed on its own, so an
+    interrupted run resumes where it stopped when init_db() runs again.
+    """
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS scan_outputs (
+            scan_id INTEGER PRIMARY KEY REFERENCES network_scans (id) ON DELETE CASCADE,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+
+        -- Re-point the scan FTS index at decompressed scan_outputs
+        DROP TRIGGER IF EXISTS network_scans_fts_ai;
+        DROP TRIGGER IF EXISTS network_scans_fts_ad;
+        DROP TRIGGER IF EXISTS network_scans_fts_au;
+        DROP TABLE IF EXISTS network_scans_fts;
+
+        CREATE VIEW IF NOT EXISTS scan_output_text AS
+            SELECT scan_id, precept_inflate(codec, data) AS raw_output FROM scan_outputs;
+        CREATE VIRTUAL TABLE network_scans_fts USING fts5(
+            raw_output, content='scan_output_text', content_rowid='scan_id',
+            tokenize='unicode61'
+        );
+        CREATE TRIGGER IF NOT EXISTS scan_outputs_fts_ai AFTER INSERT ON scan_outputs BEGIN
+            INSERT INTO network_scans_fts (rowid, raw_output)
+            VALUES (new.scan_id, precept_inflate(new.codec, new.data));
+        END;
+        CREATE TRIGGER IF NOT EXISTS scan_outputs_fts_ad AFTER DELETE ON scan_outputs BEGIN
+            INSERT INTO network_scans_fts (network_scans_fts, rowid, raw_output)
+            VALUES ('delete', old.scan_id, precept_inflate(old.codec, old.data));
+        END;
+        INSERT INTO network_scans_fts (network_scans_fts) VALUES ('rebuild');
+        """
+    )
+    last_id, moved = 0, 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, raw_output FROM network_scans "
+            "WHERE id > ? AND raw_output IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, SCAN_BACKFILL_CHUNK),
+        ).fetchall()
+        if not rows:
+            break
+        with conn:
+            conn.executemany(
+                "INSERT INTO scan_outputs (scan_id, codec, size, data) VALUES (?, ?, ?, ?)",
+                [
+                    (r["id"], SCAN_CODEC, len(r["raw_output"]), _compress(r["raw_output"]))
+                    for r in rows
+                ],
+            )
+            conn.executemany(
+                "UPDATE network_scans SET raw_output = NULL WHERE id = ?",
+                [(r["id"],) for r in rows],
+            )
+        last_id = rows[-1]["id"]
+        moved += len(rows)
+    logger.info("Compressed %d scan outputs", moved)
+
+
+# contentless_delete (SQLite 3.43+) lets a contentless FTS5 table delete
+# rows by rowid; older versions need the original text (see delete_scan)
+FTS_CONTENTLESS_DELETE = sqlite3.sqlite_version_info >= (3, 43, 0)
+
+
+def _migrate_scan_fts(conn: sqlite3.Connection):
+    """Migration 10: index scan output without SQL calls to precept_inflate().
+
+    Migration 6 pointed the FTS index at a view and triggers that
+    decompress through an app-only function, so plain sqlite3 clients
+    could no longer delete scans. The index becomes a contentless FTS5
+    table (it keeps no copy of the text) that log_scan() and
+    bulk_log_scans() fill from Python; search snippets for scans are built
+    from the decompressed output of the hits.
+
+    Without contentless_delete, a scan deleted outside delete_scan() leaves
+    its index entry behind. Scan ids are never reused (AUTOINCREMENT) and
+    searches join on network_scans, so such entries are only dead weight.
+    Re-running rebuilds the index from scratch.
+    """
+    options = ", contentless_delete=1" if FTS_CONTENTLESS_DELETE else ""
+    conn.executescript(
+        f"""
+        DROP TRIGGER IF EXISTS scan_outputs_fts_ai;
+        DROP TRIGGER IF EXISTS scan_outputs_fts_ad;
+        DROP TRIGGER IF EXISTS network_scans_fts_ad;
+        DROP TABLE IF EXISTS network_scans_fts;
+        DROP VIEW IF EXISTS scan_output_text;
+
+        CREATE VIRTUAL TABLE network_scans_fts USING fts5(
+            raw_output, content='', tokenize='unicode61'{options}
+        );
+        -- The foreign key cascade only runs with PRAGMA foreign_keys=ON,
+        -- which plain sqlite3 clients leave off
+        CREATE TRIGGER IF NOT EXISTS network_scans_outputs_ad AFTER DELETE ON network_scans BEGIN
+            DELETE FROM scan_outputs WHERE scan_id = old.id;
+        END;
+        """
+    )
+    if FTS_CONTENTLESS_DELETE:
+        conn.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS network_scans_fts_ad AFTER DELETE ON network_scans BEGIN
+                DELETE FROM network_scans_fts WHERE rowid = old.id;
+            END;
+            """
+        )
+    last_id, indexed = 0, 0
+    while True:
+        rows = conn.execute(
+            "SELECT scan_id, codec, data FROM scan_outputs "
+            "WHERE scan_id > ? ORDER BY scan_id LIMIT ?",
+            (last_id, SCAN_BACKFILL_CHUNK),
+        ).fetchall()
+        if not rows:
+            break
+        with conn:
+            conn.executemany(
+                "INSERT INTO network_scans_fts (rowid, raw_output) VALUES (?, ?)",
+                [(r["scan_id"], _inflate(r["codec"], r["data"])) for r in rows],
+            )
+        last_id = rows[-1]["scan_id"]
+        indexed += len(rows)
+    logger.info("Indexed %d scan outputs", indexed)
+
+
+def _migrate_scan_fts_contentless(conn: sqlite3.Connection):
+    """Migration 11: redo migration 10 where it built a full-text copy.
+
+    An earlier migration 10 made network_scans_fts a regular FTS5 table,
+    which stored every scan's output uncompressed. Databases where
+    migration 10 already built the contentless index are left alone.
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'network_scans_fts'"
+    ).fetchone()
+    if row and "content=''" in row["sql"]:
+        return
+    _migrate_scan_fts(conn)
+
+
 MIGRATIONS = [
     # Migration 1: initial schema
     """
@@ -95,64 +387,541 @@ MIGRATIONS = [
         created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
     );
     """,
+    # Migration 3: FTS5 indexes over transcripts, quick notes and scan output
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS voice_notes_fts USING fts5(
+        transcript, content='voice_notes', content_rowid='id',
+        tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS voice_notes_fts_ai AFTER INSERT ON voice_notes BEGIN
+        INSERT INTO voice_notes_fts (rowid, transcript) VALUES (new.id, new.transcript);
+    END;
+    CREATE TRIGGER IF NOT EXISTS voice_notes_fts_ad AFTER DELETE ON voice_notes BEGIN
+        INSERT INTO voice_notes_fts (voice_notes_fts, rowid, transcript)
+        VALUES ('delete', old.id, old.transcript);
+    END;
+    CREATE TRIGGER IF NOT EXISTS voice_notes_fts_au AFTER UPDATE OF transcript ON voice_notes BEGIN
+        INSERT INTO voice_notes_fts (voice_notes_fts, rowid, transcript)
+        VALUES ('delete', old.id, old.transcript);
+        INSERT INTO voice_notes_fts (rowid, transcript) VALUES (new.id, new.transcript);
+    END;
+    INSERT INTO voice_notes_fts (voice_notes_fts) VALUES ('rebuild');
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS quick_notes_fts USING fts5(
+        text, content='quick_notes', content_rowid='id',
+        tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS quick_notes_fts_ai AFTER INSERT ON quick_notes BEGIN
+        INSERT INTO quick_notes_fts (rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS quick_notes_fts_ad AFTER DELETE ON quick_notes BEGIN
+        INSERT INTO quick_notes_fts (quick_notes_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS quick_notes_fts_au AFTER UPDATE OF text ON quick_notes BEGIN
+        INSERT INTO quick_notes_fts (quick_notes_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO quick_notes_fts (rowid, text) VALUES (new.id, new.text);
+    END;
+    INSERT INTO quick_notes_fts (quick_notes_fts) VALUES ('rebuild');
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS network_scans_fts USING fts5(
+        raw_output, content='network_scans', content_rowid='id',
+        tokenize='unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS network_scans_fts_ai AFTER INSERT ON network_scans BEGIN
+        INSERT INTO network_scans_fts (rowid, raw_output) VALUES (new.id, new.raw_output);
+    END;
+    CREATE TRIGGER IF NOT EXISTS network_scans_fts_ad AFTER DELETE ON network_scans BEGIN
+        INSERT INTO network_scans_fts (network_scans_fts, rowid, raw_output)
+        VALUES ('delete', old.id, old.raw_output);
+    END;
+    CREATE TRIGGER IF NOT EXISTS network_scans_fts_au AFTER UPDATE OF raw_output ON network_scans BEGIN
+        INSERT INTO network_scans_fts (network_scans_fts, rowid, raw_output)
+        VALUES ('delete', old.id, old.raw_output);
+        INSERT INTO network_scans_fts (rowid, raw_output) VALUES (new.id, new.raw_output);
+    END;
+    INSERT INTO network_scans_fts (network_scans_fts) VALUES ('rebuild');
+    """,
+    # Migration 4: secondary indexes (checked by query-plan-audit.py)
+    """
+    CREATE INDEX IF NOT EXISTS idx_photos_project ON photos (project);
+    CREATE INDEX IF NOT EXISTS idx_photos_visit ON photos (visit_id);
+    CREATE INDEX IF NOT EXISTS idx_voice_notes_project ON voice_notes (project);
+    CREATE INDEX IF NOT EXISTS idx_voice_notes_visit ON voice_notes (visit_id);
+    CREATE INDEX IF NOT EXISTS idx_quick_notes_project ON quick_notes (project);
+    CREATE INDEX IF NOT EXISTS idx_quick_notes_visit ON quick_notes (visit_id);
+    CREATE INDEX IF NOT EXISTS idx_network_scans_project ON network_scans (project);
+    CREATE INDEX IF NOT EXISTS idx_network_scans_visit ON network_scans (visit_id);
+
+    CREATE INDEX IF NOT EXISTS idx_site_visits_project_started
+        ON site_visits (project, started_at);
+    CREATE INDEX IF NOT EXISTS idx_site_visits_started ON site_visits (started_at);
+    CREATE INDEX IF NOT EXISTS idx_site_visits_open
+        ON site_visits (project, started_at) WHERE ended_at IS NULL;
+
+    CREATE INDEX IF NOT EXISTS idx_tasks_visit ON tasks (visit_id);
+    CREATE INDEX IF NOT EXISTS idx_tasks_open
+        ON tasks (project, started_at) WHERE ended_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_tasks_done_duration
+        ON tasks (project, duration_minutes) WHERE ended_at IS NOT NULL;
+
+    CREATE INDEX IF NOT EXISTS idx_bot_events_created ON bot_events (created_at);
+    """,
+    # Migration 5: trigger-maintained per-project and per-visit counters
+    """
+    CREATE TABLE IF NOT EXISTS project_counters (
+        project TEXT PRIMARY KEY,
+        photos INTEGER NOT NULL DEFAULT 0,
+        voice_notes INTEGER NOT NULL DEFAULT 0,
+        visits INTEGER NOT NULL DEFAULT 0,
+        scans INTEGER NOT NULL DEFAULT 0,
+        quick_notes INTEGER NOT NULL DEFAULT 0,
+        task_minutes REAL NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS visit_counters (
+        visit_id INTEGER PRIMARY KEY,
+        photos INTEGER NOT NULL DEFAULT 0,
+        voice_notes INTEGER NOT NULL DEFAULT 0,
+        quick_notes INTEGER NOT NULL DEFAULT 0,
+        tasks INTEGER NOT NULL DEFAULT 0,
+        scans INTEGER NOT NULL DEFAULT 0
+    );
+    """
+    + _counter_triggers("photos", "photos", "photos")
+    + _counter_triggers("voice_notes", "voice_notes", "voice_notes")
+    + _counter_triggers("quick_notes", "quick_notes", "quick_notes")
+    + _counter_triggers("network_scans", "scans", "scans")
+    + _counter_triggers("site_visits", "visits", None)
+    + _counter_triggers("tasks", None, "tasks")
+    + """
+    -- Tracked minutes only count once a task has ended
+    CREATE TRIGGER IF NOT EXISTS tasks_minutes_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO project_counters (project, task_minutes)
+        SELECT new.project, COALESCE(new.duration_minutes, 0) WHERE new.ended_at IS NOT NULL
+        ON CONFLICT (project) DO UPDATE SET task_minutes = task_minutes + excluded.task_minutes;
+    END;
+    CREATE TRIGGER IF NOT EXISTS tasks_minutes_ad AFTER DELETE ON tasks BEGIN
+        UPDATE project_counters SET task_minutes = task_minutes - COALESCE(old.duration_minutes, 0)
+        WHERE project = old.project AND old.ended_at IS NOT NULL;
+    END;
+    CREATE TRIGGER IF NOT EXISTS tasks_minutes_au
+    AFTER UPDATE OF project, ended_at, duration_minutes ON tasks BEGIN
+        UPDATE project_counters SET task_minutes = task_minutes - COALESCE(old.duration_minutes, 0)
+        WHERE project = old.project AND old.ended_at IS NOT NULL;
+        INSERT INTO project_counters (project, task_minutes)
+        SELECT new.project, COALESCE(new.duration_minutes, 0) WHERE new.ended_at IS NOT NULL
+        ON CONFLICT (project) DO UPDATE SET task_minutes = task_minutes + excluded.task_minutes;
+    END;
+    """
+    + REBUILD_COUNTERS_SQL,
+    # Migration 6: compressed scan output (Python step, see function)
+    _migrate_scan_outputs,
+    # Migration 7: slow query log
+    """
+    CREATE TABLE IF NOT EXISTS slow_queries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        sql TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        query_plan TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_slow_queries_duration ON slow_queries (duration_ms);
+    """,
+    # Migration 8: integer UTC epoch columns for time-range queries
+    "\n".join(
+        [
+            _epoch_columns("photos", {"created_at": "created_ts"}),
+            _epoch_columns("voice_notes", {"created_at": "created_ts"}),
+            _epoch_columns("quick_notes", {"created_at": "created_ts"}),
+            _epoch_columns("network_scans", {"created_at": "created_ts"}),
+            _epoch_columns("bot_events", {"created_at": "created_ts"}),
+            _epoch_columns("site_visits", {"started_at": "started_ts", "ended_at": "ended_ts"}),
+            _epoch_columns("tasks", {"started_at": "started_ts", "ended_at": "ended_ts"}),
+        ]
+    )
+    + """
+    CREATE INDEX IF NOT EXISTS idx_site_visits_project_started_ts
+        ON site_visits (project, started_ts);
+    CREATE INDEX IF NOT EXISTS idx_tasks_project_started_ts ON tasks (project, started_ts);
+    """,
+    # Migration 9: per-project usage (picker ordering), kept from bot_events
+    """
+    CREATE TABLE IF NOT EXISTS project_usage (
+        project TEXT PRIMARY KEY,
+        uses INTEGER NOT NULL DEFAULT 0,
+        last_used_ts INTEGER NOT NULL DEFAULT 0
+    );
+
+    -- Only inserts count: archiving old events must not forget usage
+    CREATE TRIGGER IF NOT EXISTS bot_events_usage_ai AFTER INSERT ON bot_events
+    WHEN new.event_type IN ('project_switched', 'project_created') AND new.detail IS NOT NULL
+    BEGIN
+        INSERT INTO project_usage (project, uses, last_used_ts)
+        VALUES (
+            new.detail, 1,
+            COALESCE(new.created_ts, CAST(strftime('%s', new.created_at, 'utc') AS INTEGER))
+        )
+        ON CONFLICT (project) DO UPDATE SET
+            uses = uses + 1,
+            last_used_ts = MAX(last_used_ts, excluded.last_used_ts);
+    END;
+
+    INSERT OR IGNORE INTO project_usage (project, uses, last_used_ts)
+        SELECT detail, COUNT(*), MAX(created_ts) FROM bot_events
+        WHERE event_type IN ('project_switched', 'project_created') AND detail IS NOT NULL
+        GROUP BY detail;
+    """,
+    # Migration 10: scan FTS fed from Python, no UDFs in triggers or views
+    _migrate_scan_fts,
+    # Migration 11: contentless scan FTS where migration 10 stored the text
+    _migrate_scan_fts_contentless,
 ]
 
 
+# ---------------------------------------------------------------------------
+# Query timing
+# ---------------------------------------------------------------------------
+
+# Latency histogram bucket upper bounds (ms) for query timing
+TIMING_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+# Rows kept in slow_queries
+SLOW_QUERY_KEEP = 1000
+
+_query_stats: dict[str, dict] = {}
+_query_names: dict[tuple[str, str], str] = {}
+_stats_lock = threading.Lock()
+_pending_slow: list[tuple] = []
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+
+
+def _query_name(caller: str, sql: str) -> str:
+    """Short stable name for a statement: calling function + verb + table."""
+    key = (caller, sql)
+    name = _query_names.get(key)
+    if name is None:
+        verb = sql.split(None, 1)[0].upper() if sql.strip() else "?"
+        m = _TABLE_RE.search(sql)
+        table = m.group(1) if m else ""
+        name = f"{caller}:{verb} {table}".strip()
+        _query_names[key] = name
+    return name
+
+
+def _record_timing(name: str, sql: str, params, elapsed_ms: float, conn) -> None:
+    with _stats_lock:
+        st = _query_stats.get(name)
+        if st is None:
+            st = _query_stats[name] = {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "buckets": [0] * len(TIMING_BUCKETS_MS),
+            }
+        st["count"] += 1
+        st["total_ms"] += elapsed_ms
+        st["max_ms"] = max(st["max_ms"], elapsed_ms)
+        for i, bound in enumerate(TIMING_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                st["buckets"][i] += 1
+                break
+
+    if elapsed_ms < config.SLOW_QUERY_MS:
+        return
+    plan = None
+    if params is not None:
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = "\n".join(r[3] for r in rows.fetchall())
+        except sqlite3.Error:
+            pass
+    logger.warning("Slow query %s: %.1f ms", name, elapsed_ms)
+    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with _events_lock:
+        _pending_slow.append((name, " ".join(sql.split()), elapsed_ms, plan, created_at))
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Connection that times every statement by query name.
+
+    Timing covers preparing and running the statement up to its first row.
+    An executescript() call (migrations, vacuum steps) is timed as a whole
+    under "<caller>:SCRIPT", without a query plan for slow ones.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cur = super().execute(sql, parameters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        caller = sys._getframe(1).f_code.co_name
+        _record_timing(_query_name(caller, sql), sql, parameters, elapsed_ms, self)
+        return cur
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        cur = super().executemany(sql, seq_of_parameters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        caller = sys._getframe(1).f_code.co_name
+        _record_timing(_query_name(caller, sql), sql, None, elapsed_ms, self)
+        return cur
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        cur = super().executescript(sql_script)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        caller = sys._getframe(1).f_code.co_name
+        _record_timing(f"{caller}:SCRIPT", sql_script, None, elapsed_ms, self)
+        return cur
+
+
+def query_stats() -> list[dict]:
+    """Per-query timing since start-up, largest total time first.
+
+    p50/p99 are histogram bucket upper bounds.
+    """
+    with _stats_lock:
+        snapshot = {name: dict(st, buckets=list(st["buckets"])) for name, st in _query_stats.items()}
+    out = []
+    for name, st in snapshot.items():
+        def pct(q, st=st):
+            target, seen = q * st["count"], 0
+            for bound, n in zip(TIMING_BUCKETS_MS, st["buckets"]):
+                seen += n
+                if seen >= target:
+                    return round(min(bound, st["max_ms"]), 3)
+            return round(st["max_ms"], 3)
+
+        out.append(
+            {
+                "name": name,
+                "count": st["count"],
+                "total_ms": round(st["total_ms"], 1),
+                "avg_ms": round(st["total_ms"] / st["count"], 3),
+                "p50_ms": pct(0.5),
+                "p99_ms": pct(0.99),
+                "max_ms": round(st["max_ms"], 3),
+            }
+        )
+    out.sort(key=lambda r: r["total_ms"], reverse=True)
+    return out
+
+
+def reset_query_stats():
+    """Forget the timings query_stats() reports (slow_queries rows stay)."""
+    with _stats_lock:
+        _query_stats.clear()
+
+
 # ---------------------------------------------------------------------------
 # Connection helpers
 # ---------------------------------------------------------------------------
 
+# PRAGMA profiles applied once when a connection is opened. WAL with
+# synchronous=NORMAL is crash-safe; only the last commits can be lost on
+# power failure. "durable" trades write latency for fsync on every commit.
+PRAGMA_PROFILES = {
+    "bot": {
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # ~16 MB page cache
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "cli": {
+        "synchronous": "NORMAL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "durable": {
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Prepared statements kept per connection (sqlite3 caches by SQL text)
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_conns: list[sqlite3.Connection] = []
+_conns_lock = threading.Lock()
+_generation = 0  # bumped by close_all() so other threads reopen
+_profile = config.DB_PROFILE
+
+
+def configure(profile: str):
+    """Select the PRAGMA profile for new connections.
+
+    Closes any open connections so the next call reopens with the new profile.
+    """
+    global _profile
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown DB profile: {profile}")
+    close_all()
+    _profile = profile
 
-def _get_conn() -> sqlite3.Connection:
-    """Open a connection to the database."""
+
+def _open_conn() -> sqlite3.Connection:
+    """Open and tune a new connection to the database."""
     config.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(config.DB_PATH))
+    conn = sqlite3.connect(
+        str(config.DB_PATH),
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=_TimedConnection,
+    )
     conn.row_factory = sqlite3.Row
+    # Only takes effect on a brand-new file (so must precede journal_mode);
+    # existing databases are converted by maintain()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.create_function("precept_inflate", 2, _inflate, deterministic=True)
+    for pragma, value in PRAGMA_PROFILES[_profile].items():
+        conn.execute(f"PRAGMA {pragma}={value}")
     return conn
 
 
-def init_db():
-    """Run any unapplied migrations. Called once at bot startup."""
+def _get_conn() -> sqlite3.Connection:
+    """Return this thread's long-lived connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.generation != _generation:
+        conn = _open_conn()
+        _local.conn = conn
+        _local.generation = _generation
+        with _conns_lock:
+            _conns.append(conn)
+        logger.debug(
+            "Opened DB connection (thread %s, profile %s)",
+            threading.current_thread().name,
+            _profile,
+        )
+    return conn
+
+
+def close_all():
+    """Flush buffered events and close every pooled connection.
+
+    Called on bot shutdown and at the end of scripts.
+    """
+    global _generation
+    try:
+        flush_events()
+    except sqlite3.Error as exc:
+        logger.error("Could not flush buffered events: %s", exc)
+    with _conns_lock:
+        conns = list(_conns)
+        _conns.clear()
+        _generation += 1
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error as exc:
+            logger.warning("Error closing DB connection: %s", exc)
+    if conns:
+        logger.info("Closed %d DB connection(s)", len(conns))
+
+
+@contextmanager
+def transaction():
+    """Group writes on this thread's connection into a single commit.
+
+        with db.transaction():
+            db.log_photo(...)
+            db.log_quick_note(...)
+
+    Nested calls (including the ones inside log_photo() and friends) join
+    the outermost transaction; it commits when that block exits and rolls
+    back everything if it raises. Events logged inside are written in the
+    same transaction instead of the write-behind buffer. From async code,
+    run the whole block on the DB thread with adb.run().
+    """
     conn = _get_conn()
+    depth = getattr(_local, "tx_depth", 0)
+    _local.tx_depth = depth + 1
     try:
-        # Ensure schema_version table exists for the very first run
-        conn.execute(
-            "CREATE TABLE IF NOT EXISTS schema_version "
-            "(version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL)"
-        )
-        conn.commit()
+        if depth:
+            yield conn
+        else:
+            with conn:
+                yield conn
+    finally:
+        _local.tx_depth = depth
+
+
+def init_db():
+    """Apply any unapplied migrations.
 
-        applied = {
+    The applied migration count is kept in PRAGMA user_version, so an
+    up-to-date database costs a single header read and no writes.
+    """
+    conn = _get_conn()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        logger.debug("Database up to date at %s (version %d)", config.DB_PATH, version)
+        return
+
+    # Databases from before user_version tracking record their history
+    # in schema_version only
+    applied = set(range(1, version + 1))
+    has_history = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if has_history:
+        applied |= {
             row[0]
             for row in conn.execute("SELECT version FROM schema_version").fetchall()
         }
 
-        for i, sql in enumerate(MIGRATIONS, start=1):
-            if i not in applied:
-                logger.info("Applying migration %d", i)
-                conn.executescript(sql)
-                conn.execute(
-                    "INSERT INTO schema_version (version, applied_at) VALUES (?, ?)",
-                    (i, datetime.now().isoformat()),
-                )
-                conn.commit()
-                logger.info("Migration %d applied", i)
-
-        logger.info(
-            "Database ready at %s (%d migrations applied)",
-            config.DB_PATH,
-            len(applied | set(range(1, len(MIGRATIONS) + 1))),
-        )
-    finally:
-        conn.close()
+    for i, step in enumerate(MIGRATIONS, start=1):
+        if i in applied:
+            continue
+        logger.info("Applying migration %d", i)
+        if callable(step):
+            # Python steps commit their own chunks and are safe to re-run
+            step(conn)
+            sql = ""
+        else:
+            sql = step
+        # One transaction per migration: schema, history row and version
+        try:
+            conn.executescript(
+                f"BEGIN;\n{sql};\n"
+                "CREATE TABLE IF NOT EXISTS schema_version "
+                "(version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL);\n"
+                f"INSERT OR REPLACE INTO schema_version (version, applied_at) "
+                f"VALUES ({i}, '{datetime.now().isoformat()}');\n"
+                f"PRAGMA user_version = {i};\n"
+                "COMMIT;"
+            )
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        logger.info("Migration %d applied", i)
+
+    if len(applied) > version:
+        # Record history that predates user_version tracking
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+
+    logger.info(
+        "Database ready at %s (%d migrations applied)", config.DB_PATH, len(MIGRATIONS)
+    )
 
 
 # ---------------------------------------------------------------------------
 # Logging helpers
 # ---------------------------------------------------------------------------
 
+# Write-behind buffer for bot_events (see log_event)
+_pending_events: list[tuple] = []
+_pending_since = 0.0
+_events_lock = threading.Lock()
+
 
 def log_photo(
     project: str,
@@ -163,18 +932,14 @@ def log_photo(
     visit_id: int | None = None,
 ) -> int:
     """Log a photo and return its row id."""
-    conn = _get_conn()
-    try:
+    with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO photos (project, filepath, caption, latitude, longitude, visit_id) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (project, filepath, caption, latitude, longitude, visit_id),
+            "INSERT INTO photos (project, filepath, caption, latitude, longitude, visit_id, "
+            "created_at, created_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (project, filepath, caption, latitude, longitude, visit_id, *_now_stamp()),
         )
-        conn.commit()
         log_event("photo_saved", f"{filepath}", project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
 
 
 def log_voice(
@@ -184,51 +949,100 @@ def log_voice(
     visit_id: int | None = None,
 ) -> int:
     """Log a voice note and return its row id."""
-    conn = _get_conn()
-    try:
+    with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO voice_notes (project, filepath, transcript, visit_id) "
-            "VALUES (?, ?, ?, ?)",
-            (project, filepath, transcript, visit_id),
+            "INSERT INTO voice_notes (project, filepath, transcript, visit_id, "
+            "created_at, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (project, filepath, transcript, visit_id, *_now_stamp()),
         )
-        conn.commit()
         log_event("voice_saved", f"{filepath}", project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
 
 
 def log_event(
     event_type: str, detail: str | None = None, project: str | None = None
-) -> int:
-    """Log a bot event and return its row id."""
-    conn = _get_conn()
-    try:
-        cur = conn.execute(
-            "INSERT INTO bot_events (event_type, detail, project) VALUES (?, ?, ?)",
-            (event_type, detail, project),
+):
+    """Record a bot event.
+
+    Inside transaction() the row is written in that transaction, so it
+    commits (or rolls back) with the change it describes. Otherwise events
+    are buffered in memory and written in one transaction once
+    EVENT_BATCH_SIZE are pending or the oldest is EVENT_FLUSH_SECONDS old.
+    At most that many events (or seconds of events) are lost on a crash.
+    """
+    global _pending_since
+    row = (event_type, detail, project, *_now_stamp())
+    if getattr(_local, "tx_depth", 0):
+        _get_conn().execute(
+            "INSERT INTO bot_events (event_type, detail, project, created_at, created_ts) "
+            "VALUES (?, ?, ?, ?, ?)",
+            row,
         )
-        conn.commit()
-        return cur.lastrowid
-    finally:
-        conn.close()
+        return
+    with _events_lock:
+        _pending_events.append(row)
+        if len(_pending_events) == 1:
+            _pending_since = time.monotonic()
+        due = (
+            len(_pending_events) >= config.EVENT_BATCH_SIZE
+            or time.monotonic() - _pending_since >= config.EVENT_FLUSH_SECONDS
+        )
+    if due:
+        flush_events()
+
+
+def flush_events() -> int:
+    """Write buffered events and slow-query records in one transaction.
+
+    Returns the number of bot_events rows written.
+    """
+    with _events_lock:
+        batch = list(_pending_events)
+        _pending_events.clear()
+        slow = list(_pending_slow)
+        _pending_slow.clear()
+    if not batch and not slow:
+        return 0
+    try:
+        with transaction() as conn:
+            if batch:
+                conn.executemany(
+                    "INSERT INTO bot_events (event_type, detail, project, created_at, created_ts) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    batch,
+                )
+            if slow:
+                conn.executemany(
+                    "INSERT INTO slow_queries (name, sql, duration_ms, query_plan, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    slow,
+                )
+                conn.execute(
+                    "DELETE FROM slow_queries WHERE id <= "
+                    "(SELECT MAX(id) FROM slow_queries) - ?",
+                    (SLOW_QUERY_KEEP,),
+                )
+    except sqlite3.Error:
+        # Put the batch back so the next flush retries it
+        with _events_lock:
+            _pending_events[:0] = batch
+            _pending_slow[:0] = slow
+        raise
+    return len(batch)
 
 
 def log_quick_note(
     project: str, text: str, visit_id: int | None = None
 ) -> int:
     """Log a quick note and return its row id."""
-    conn = _get_conn()
-    try:
+    with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO quick_notes (project, text, visit_id) VALUES (?, ?, ?)",
-            (project, text, visit_id),
+            "INSERT INTO quick_notes (project, text, visit_id, created_at, created_ts) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (project, text, visit_id, *_now_stamp()),
         )
-        conn.commit()
         log_event("quick_note", text[:100], project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
 
 
 # ---------------------------------------------------------------------------
@@ -243,104 +1057,87 @@ def start_visit(
     longitude: float | None = None,
 ) -> int:
     """Start a site visit and return the visit id."""
-    conn = _get_conn()
-    try:
+    with transaction() as conn:
         cur = conn.execute(
             "INSERT INTO site_visits (project, location, latitude, longitude) "
             "VALUES (?, ?, ?, ?)",
             (project, location, latitude, longitude),
         )
-        conn.commit()
         log_event("visit_started", location or "no location", project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
 
 
 def end_visit(visit_id: int, notes: str | None = None) -> dict | None:
     """End a site visit and return a summary dict."""
     conn = _get_conn()
-    try:
-        visit = conn.execute(
-            "SELECT * FROM site_visits WHERE id = ?", (visit_id,)
-        ).fetchone()
-        if not visit:
-            return None
-
-        now = datetime.now().isoformat()
-
-        # Count items captured during this visit
-        photo_count = conn.execute(
-            "SELECT COUNT(*) FROM photos WHERE visit_id = ?", (visit_id,)
-        ).fetchone()[0]
-        voice_count = conn.execute(
-            "SELECT COUNT(*) FROM voice_notes WHERE visit_id = ?", (visit_id,)
-        ).fetchone()[0]
-        task_count = conn.execute(
-            "SELECT COUNT(*) FROM tasks WHERE visit_id = ?", (visit_id,)
-        ).fetchone()[0]
-        scan_count = conn.execute(
-            "SELECT COUNT(*) FROM network_scans WHERE visit_id = ?", (visit_id,)
-        ).fetchone()[0]
-        note_count = conn.execute(
-            "SELECT COUNT(*) FROM quick_notes WHERE visit_id = ?", (visit_id,)
-        ).fetchone()[0]
-
-        # Calculate duration
-        started = datetime.fromisoformat(visit["started_at"])
-        ended = datetime.fromisoformat(now)
-        duration = ended - started
-        hours, remainder = divmod(int(duration.total_seconds()), 3600)
-        minutes = remainder // 60
-
-        summary = (
-            f"Visit to {visit['project']}"
-            f"{' at ' + visit['location'] if visit['location'] else ''}\n"
-            f"Duration: {hours}h {minutes}m\n"
-            f"Photos: {photo_count}, Voice notes: {voice_count}, "
-            f"Notes: {note_count}, Tasks: {task_count}, Scans: {scan_count}"
-        )
-        if notes:
-            summary += f"\nNotes: {notes}"
-
+    visit = conn.execute(
+        "SELECT * FROM site_visits WHERE id = ?", (visit_id,)
+    ).fetchone()
+    if not visit:
+        return None
+
+    now = datetime.now().isoformat()
+
+    # Items captured during this visit (kept current by triggers)
+    counts = conn.execute(
+        "SELECT * FROM visit_counters WHERE visit_id = ?", (visit_id,)
+    ).fetchone()
+    photo_count = counts["photos"] if counts else 0
+    voice_count = counts["voice_notes"] if counts else 0
+    note_count = counts["quick_notes"] if counts else 0
+    task_count = counts["tasks"] if counts else 0
+    scan_count = counts["scans"] if counts else 0
+
+    # Calculate duration
+    started = datetime.fromisoformat(visit["started_at"])
+    ended = datetime.fromisoformat(now)
+    duration = ended - started
+    hours, remainder = divmod(int(duration.total_seconds()), 3600)
+    minutes = remainder // 60
+
+    summary = (
+        f"Visit to {visit['project']}"
+        f"{' at ' + visit['location'] if visit['location'] else ''}\n"
+        f"Duration: {hours}h {minutes}m\n"
+        f"Photos: {photo_count}, Voice notes: {voice_count}, "
+        f"Notes: {note_count}, Tasks: {task_count}, Scans: {scan_count}"
+    )
+    if notes:
+        summary += f"\nNotes: {notes}"
+
+    with transaction():
         conn.execute(
             "UPDATE site_visits SET ended_at = ?, notes = ?, summary = ? WHERE id = ?",
             (now, notes, summary, visit_id),
         )
-        conn.commit()
         log_event("visit_ended", summary, visit["project"])
 
-        return {
-            "visit_id": visit_id,
-            "project": visit["project"],
-            "location": visit["location"],
-            "started_at": visit["started_at"],
-            "ended_at": now,
-            "duration": f"{hours}h {minutes}m",
-            "photo_count": photo_count,
-            "voice_count": voice_count,
-            "note_count": note_count,
-            "task_count": task_count,
-            "scan_count": scan_count,
-            "notes": notes,
-            "summary": summary,
-        }
-    finally:
-        conn.close()
+    return {
+        "visit_id": visit_id,
+        "project": visit["project"],
+        "location": visit["location"],
+        "started_at": visit["started_at"],
+        "ended_at": now,
+        "duration": f"{hours}h {minutes}m",
+        "photo_count": photo_count,
+        "voice_count": voice_count,
+        "note_count": note_count,
+        "task_count": task_count,
+        "scan_count": scan_count,
+        "notes": notes,
+        "summary": summary,
+    }
 
 
 def get_active_visit(project: str) -> dict | None:
     """Return the active (unended) visit for a project, or None."""
     conn = _get_conn()
-    try:
-        row = conn.execute(
-            "SELECT * FROM site_visits WHERE project = ? AND ended_at IS NULL "
-            "ORDER BY started_at DESC LIMIT 1",
-            (project,),
-        ).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+    row = conn.execute(
+        "SELECT * FROM site_visits WHERE project = ? AND ended_at IS NULL "
+        "ORDER BY started_at DESC LIMIT 1",
+        (project,),
+    ).fetchone()
+    return dict(row) if row else None
 
 
 # ---------------------------------------------------------------------------
@@ -352,66 +1149,56 @@ def start_task(
     project: str, description: str, visit_id: int | None = None
 ) -> int:
     """Start a timed task and return its id."""
-    conn = _get_conn()
-    try:
+    with transaction() as conn:
         cur = conn.execute(
             "INSERT INTO tasks (project, description, visit_id) VALUES (?, ?, ?)",
             (project, description, visit_id),
         )
-        conn.commit()
         log_event("task_started", description, project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
 
 
 def end_task(task_id: int) -> dict | None:
     """End a task and return its details including duration."""
     conn = _get_conn()
-    try:
-        task = conn.execute(
-            "SELECT * FROM tasks WHERE id = ?", (task_id,)
-        ).fetchone()
-        if not task:
-            return None
-
-        now = datetime.now().isoformat()
-        started = datetime.fromisoformat(task["started_at"])
-        ended = datetime.fromisoformat(now)
-        duration = ended - started
-        duration_minutes = duration.total_seconds() / 60
-
+    task = conn.execute(
+        "SELECT * FROM tasks WHERE id = ?", (task_id,)
+    ).fetchone()
+    if not task:
+        return None
+
+    now = datetime.now().isoformat()
+    started = datetime.fromisoformat(task["started_at"])
+    ended = datetime.fromisoformat(now)
+    duration = ended - started
+    duration_minutes = duration.total_seconds() / 60
+
+    with transaction():
         conn.execute(
             "UPDATE tasks SET ended_at = ?, duration_minutes = ? WHERE id = ?",
             (now, duration_minutes, task_id),
         )
-        conn.commit()
         log_event("task_ended", f"{task['description']} ({duration_minutes:.0f}m)", task["project"])
 
-        return {
-            "task_id": task_id,
-            "project": task["project"],
-            "description": task["description"],
-            "started_at": task["started_at"],
-            "ended_at": now,
-            "duration_minutes": duration_minutes,
-        }
-    finally:
-        conn.close()
+    return {
+        "task_id": task_id,
+        "project": task["project"],
+        "description": task["description"],
+        "started_at": task["started_at"],
+        "ended_at": now,
+        "duration_minutes": duration_minutes,
+    }
 
 
 def get_active_task(project: str) -> dict | None:
     """Return the active (unfinished) task for a project, or None."""
     conn = _get_conn()
-    try:
-        row = conn.execute(
-            "SELECT * FROM tasks WHERE project = ? AND ended_at IS NULL "
-            "ORDER BY started_at DESC LIMIT 1",
-            (project,),
-        ).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+    row = conn.execute(
+        "SELECT * FROM tasks WHERE project = ? AND ended_at IS NULL "
+        "ORDER BY started_at DESC LIMIT 1",
+        (project,),
+    ).fetchone()
+    return dict(row) if row else None
 
 
 # ---------------------------------------------------------------------------
@@ -426,19 +1213,100 @@ def log_scan(
     raw_output: str | None = None,
     visit_id: int | None = None,
 ) -> int:
-    """Log a network scan and return its row id."""
-    conn = _get_conn()
-    try:
+    """Log a network scan and return its row id.
+
+    raw_output is stored compressed in scan_outputs; read it back with
+    get_scan_output().
+    """
+    with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO network_scans (project, scan_type, filepath, raw_output, visit_id) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (project, scan_type, filepath, raw_output, visit_id),
+            "INSERT INTO network_scans (project, scan_type, filepath, visit_id, "
+            "created_at, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (project, scan_type, filepath, visit_id, *_now_stamp()),
         )
-        conn.commit()
+        if raw_output is not None:
+            conn.execute(
+                "INSERT INTO scan_outputs (scan_id, codec, size, data) VALUES (?, ?, ?, ?)",
+                (cur.lastrowid, SCAN_CODEC, len(raw_output), _compress(raw_output)),
+            )
+            conn.execute(
+                "INSERT INTO network_scans_fts (rowid, raw_output) VALUES (?, ?)",
+                (cur.lastrowid, raw_output),
+            )
         log_event("scan_logged", f"{scan_type}: {filepath or 'inline'}", project)
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
+
+
+def bulk_log_scans(records: list[dict]) -> list[int]:
+    """Log many scans in one transaction and return their row ids.
+
+    Each record takes the log_scan() arguments as keys: project, scan_type,
+    and optionally filepath, raw_output, visit_id.
+    """
+    if not records:
+        return []
+    stamp = _now_stamp()
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO network_scans (project, scan_type, filepath, visit_id, "
+            "created_at, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r["project"], r["scan_type"], r.get("filepath"), r.get("visit_id"), *stamp)
+                for r in records
+            ],
+        )
+        # One writer holds the lock, so AUTOINCREMENT ids are consecutive
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids = list(range(last_id - len(records) + 1, last_id + 1))
+        outputs = [
+            (scan_id, r["raw_output"])
+            for scan_id, r in zip(ids, records)
+            if r.get("raw_output") is not None
+        ]
+        conn.executemany(
+            "INSERT INTO scan_outputs (scan_id, codec, size, data) VALUES (?, ?, ?, ?)",
+            [(scan_id, SCAN_CODEC, len(text), _compress(text)) for scan_id, text in outputs],
+        )
+        conn.executemany(
+            "INSERT INTO network_scans_fts (rowid, raw_output) VALUES (?, ?)", outputs
+        )
+        for r in records:
+            log_event("scan_logged", f"{r['scan_type']}: {r.get('filepath') or 'inline'}", r["project"])
+    return ids
+
+
+def get_scan_output(scan_id: int) -> str | None:
+    """Return the decompressed raw output of a scan, or None."""
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT codec, data FROM scan_outputs WHERE scan_id = ?", (scan_id,)
+    ).fetchone()
+    if row:
+        return _inflate(row["codec"], row["data"])
+    # Rows written before migration 6 finished backfilling
+    row = conn.execute(
+        "SELECT raw_output FROM network_scans WHERE id = ?", (scan_id,)
+    ).fetchone()
+    return row["raw_output"] if row else None
+
+
+def delete_scan(scan_id: int) -> bool:
+    """Delete a scan, its stored output and its search index entry.
+
+    Returns False if there was no such scan.
+    """
+    with transaction() as conn:
+        if not FTS_CONTENTLESS_DELETE:
+            # A contentless index can only forget a row given its text
+            text = get_scan_output(scan_id)
+            if text is not None:
+                conn.execute(
+                    "INSERT INTO network_scans_fts (network_scans_fts, rowid, raw_output) "
+                    "VALUES ('delete', ?, ?)",
+                    (scan_id, text),
+                )
+        cur = conn.execute("DELETE FROM network_scans WHERE id = ?", (scan_id,))
+    return cur.rowcount > 0
 
 
 # ---------------------------------------------------------------------------
@@ -446,96 +1314,537 @@ def log_scan(
 # ---------------------------------------------------------------------------
 
 
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word as a quoted prefix term."""
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+
+# Words as the unicode61 tokenizer splits them
+_WORD_RE = re.compile(r"\w+")
+SNIPPET_TOKENS = 16
+
+
+def _snippet(text: str, query: str, tokens: int = SNIPPET_TOKENS) -> str:
+    """A snippet() lookalike for text FTS5 does not store.
+
+    About `tokens` words around the first match, matches (prefix terms, as
+    in _fts_query) wrapped in *asterisks*, "..." where text was cut. Only
+    the text up to just past the window is tokenised.
+    """
+    terms = tuple(_WORD_RE.findall(query.lower()))
+    words = _WORD_RE.finditer(text)
+    before: deque = deque(maxlen=tokens - 1)
+    head, first, seen = [], None, 0
+    for m in words:
+        if m.group().lower().startswith(terms):
+            first = m
+            break
+        before.append(m)
+        if len(head) <= tokens:
+            head.append(m)
+        seen += 1
+    if first is None:
+        # FTS matched what the word pattern does not (e.g. diacritics)
+        window, start, end, n = head[:tokens], 0, min(len(head), tokens), len(head)
+    else:
+        # One word beyond the window tells whether the text goes on
+        after = list(islice(words, tokens))
+        n = seen + 1 + len(after)
+        start = max(0, min(seen - tokens // 4, n - tokens))
+        end = min(n, start + tokens)
+        offset = seen - len(before)
+        window = [*before, first, *after][start - offset : end - offset]
+    if not window:
+        return ""
+    parts, pos = [], window[0].start()
+    for m in window:
+        word = m.group()
+        parts.append(text[pos : m.start()])
+        parts.append(f"*{word}*" if word.lower().startswith(terms) else word)
+        pos = m.end()
+    return ("..." if start else "") + "".join(parts) + ("..." if end < n else "")
+
+
 def search_transcripts(query: str, limit: int = 10) -> list[dict]:
-    """Search voice note transcripts and quick notes for a keyword."""
+    """Full-text search of voice transcripts, quick notes and scan output.
+
+    Results are ranked by BM25 and carry a snippet with matches wrapped in
+    *asterisks*. Scan results have text=None; fetch the full output with
+    get_scan_output(id). The scan index keeps no text, so scan snippets
+    are built here from the outputs of the hits that make the cut.
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
     conn = _get_conn()
-    try:
-        # Voice transcripts
-        voice_rows = conn.execute(
-            "SELECT id, project, filepath, transcript AS text, 'voice' AS source, created_at "
-            "FROM voice_notes WHERE transcript LIKE ? "
-            "ORDER BY created_at DESC LIMIT ?",
-            (f"%{query}%", limit),
-        ).fetchall()
-        # Quick notes
-        note_rows = conn.execute(
-            "SELECT id, project, NULL AS filepath, text, 'note' AS source, created_at "
-            "FROM quick_notes WHERE text LIKE ? "
-            "ORDER BY created_at DESC LIMIT ?",
-            (f"%{query}%", limit),
-        ).fetchall()
-        # Merge and sort by created_at descending
-        combined = [dict(r) for r in voice_rows] + [dict(r) for r in note_rows]
-        combined.sort(key=lambda x: x["created_at"], reverse=True)
-        return combined[:limit]
-    finally:
-        conn.close()
+    # Each source is limited first so snippets are only built for rows
+    # that can make the final cut
+    rows = conn.execute(
+        "SELECT * FROM ("
+        "  SELECT * FROM ("
+        "    SELECT v.id, v.project, v.filepath, v.transcript AS text, 'voice' AS source,"
+        "      v.created_at, snippet(voice_notes_fts, 0, '*', '*', '...', 16) AS snippet,"
+        "      voice_notes_fts.rank AS rank"
+        "    FROM voice_notes_fts JOIN voice_notes v ON v.id = voice_notes_fts.rowid"
+        "    WHERE voice_notes_fts MATCH :q ORDER BY voice_notes_fts.rank LIMIT :limit)"
+        "  UNION ALL"
+        "  SELECT * FROM ("
+        "    SELECT n.id, n.project, NULL, n.text, 'note', n.created_at,"
+        "      snippet(quick_notes_fts, 0, '*', '*', '...', 16), quick_notes_fts.rank"
+        "    FROM quick_notes_fts JOIN quick_notes n ON n.id = quick_notes_fts.rowid"
+        "    WHERE quick_notes_fts MATCH :q ORDER BY quick_notes_fts.rank LIMIT :limit)"
+        "  UNION ALL"
+        "  SELECT * FROM ("
+        "    SELECT s.id, s.project, s.filepath, NULL, 'scan', s.created_at,"
+        "      NULL, network_scans_fts.rank"
+        "    FROM network_scans_fts JOIN network_scans s ON s.id = network_scans_fts.rowid"
+        "    WHERE network_scans_fts MATCH :q ORDER BY network_scans_fts.rank LIMIT :limit)"
+        ") ORDER BY rank LIMIT :limit",
+        {"q": match, "limit": limit},
+    ).fetchall()
+    results = [dict(r) for r in rows]
+    for r in results:
+        if r["source"] == "scan":
+            r["snippet"] = _snippet(get_scan_output(r["id"]) or "", query)
+    return results
 
 
 def recent_activity(limit: int = 20) -> list[dict]:
     """Return recent bot events."""
+    flush_events()
     conn = _get_conn()
-    try:
-        rows = conn.execute(
-            "SELECT * FROM bot_events ORDER BY created_at DESC LIMIT ?",
-            (limit,),
-        ).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+    rows = conn.execute(
+        "SELECT * FROM bot_events ORDER BY created_at DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
 
 def visit_history(project: str | None = None, limit: int = 10) -> list[dict]:
     """Return visit history, optionally filtered by project."""
     conn = _get_conn()
-    try:
-        if project:
-            rows = conn.execute(
-                "SELECT * FROM site_visits WHERE project = ? "
-                "ORDER BY started_at DESC LIMIT ?",
-                (project, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM site_visits ORDER BY started_at DESC LIMIT ?",
-                (limit,),
-            ).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+    if project:
+        rows = conn.execute(
+            "SELECT * FROM site_visits WHERE project = ? "
+            "ORDER BY started_at DESC LIMIT ?",
+            (project, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM site_visits ORDER BY started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [dict(r) for r in rows]
 
 
 def project_stats(project: str) -> dict:
-    """Return aggregate stats for a project."""
+    """Return aggregate stats for a project (from trigger-kept counters)."""
     conn = _get_conn()
-    try:
-        photos = conn.execute(
-            "SELECT COUNT(*) FROM photos WHERE project = ?", (project,)
-        ).fetchone()[0]
-        voices = conn.execute(
-            "SELECT COUNT(*) FROM voice_notes WHERE project = ?", (project,)
-        ).fetchone()[0]
-        visits = conn.execute(
-            "SELECT COUNT(*) FROM site_visits WHERE project = ?", (project,)
-        ).fetchone()[0]
-        scans = conn.execute(
-            "SELECT COUNT(*) FROM network_scans WHERE project = ?", (project,)
-        ).fetchone()[0]
-        notes = conn.execute(
-            "SELECT COUNT(*) FROM quick_notes WHERE project = ?", (project,)
-        ).fetchone()[0]
-        total_task_mins = conn.execute(
-            "SELECT COALESCE(SUM(duration_minutes), 0) FROM tasks "
-            "WHERE project = ? AND ended_at IS NOT NULL",
-            (project,),
-        ).fetchone()[0]
+    row = conn.execute(
+        "SELECT * FROM project_counters WHERE project = ?", (project,)
+    ).fetchone()
+    if not row:
         return {
-            "photos": photos,
-            "voice_notes": voices,
-            "visits": visits,
-            "scans": scans,
-            "quick_notes": notes,
-            "total_task_hours": round(total_task_mins / 60, 1),
+            "photos": 0,
+            "voice_notes": 0,
+            "visits": 0,
+            "scans": 0,
+            "quick_notes": 0,
+            "total_task_hours": 0.0,
         }
-    finally:
-        conn.close()
+    return {
+        "photos": row["photos"],
+        "voice_notes": row["voice_notes"],
+        "visits": row["visits"],
+        "scans": row["scans"],
+        "quick_notes": row["quick_notes"],
+        "total_task_hours": round(row["task_minutes"] / 60, 1),
+    }
+
+
+def change_counter() -> tuple[int, int, int]:
+    """A value that differs whenever the database may have changed.
+
+    data_version moves when another connection (register-scan.py, say)
+    commits; total_changes counts this connection's own writes.
+    """
+    conn = _get_conn()
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    return (_local.generation, version, conn.total_changes)
+
+
+def project_usage() -> dict[str, tuple[int, int]]:
+    """Map each project to (times selected, epoch of last selection)."""
+    conn = _get_conn()
+    rows = conn.execute("SELECT project, uses, last_used_ts FROM project_usage").fetchall()
+    return {r["project"]: (r["uses"], r["last_used_ts"]) for r in rows}
+
+
+def slow_queries(limit: int = 10) -> list[dict]:
+    """Return the slowest recorded statements."""
+    flush_events()
+    conn = _get_conn()
+    rows = conn.execute(
+        "SELECT * FROM slow_queries ORDER BY duration_ms DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def rebuild_counters():
+    """Recompute project_counters and visit_counters from scratch."""
+    with transaction() as conn:
+        for statement in REBUILD_COUNTERS_SQL.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+    logger.info("Counters rebuilt")
+
+
+# ---------------------------------------------------------------------------
+# Time ranges (integer UTC epoch columns, see migration 8)
+# ---------------------------------------------------------------------------
+
+
+def _epoch(moment: datetime) -> int:
+    """Epoch seconds for a datetime; naive values are local time."""
+    return int(moment.timestamp())
+
+
+def _now_stamp() -> tuple[str, int]:
+    """(created_at, created_ts) for a row written now."""
+    now = datetime.now().replace(microsecond=0)
+    return now.strftime("%Y-%m-%d %H:%M:%S"), _epoch(now)
+
+
+def day_range(day: date | None = None) -> tuple[datetime, datetime]:
+    """[start, end) of a local calendar day, today by default."""
+    start = datetime.combine(day or date.today(), dtime.min)
+    return start, start + timedelta(days=1)
+
+
+def week_range(day: date | None = None) -> tuple[datetime, datetime]:
+    """[start, end) of the Monday-to-Sunday week containing day."""
+    day = day or date.today()
+    start = datetime.combine(day - timedelta(days=day.weekday()), dtime.min)
+    return start, start + timedelta(days=7)
+
+
+def visits_between(
+    start: datetime, end: datetime, project: str | None = None
+) -> list[dict]:
+    """Return visits started in [start, end), newest first."""
+    conn = _get_conn()
+    if project:
+        rows = conn.execute(
+            "SELECT * FROM site_visits WHERE project = ? "
+            "AND started_ts >= ? AND started_ts < ? ORDER BY started_ts DESC",
+            (project, _epoch(start), _epoch(end)),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM site_visits WHERE started_ts >= ? AND started_ts < ? "
+            "ORDER BY started_ts DESC",
+            (_epoch(start), _epoch(end)),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def tasks_between(
+    start: datetime, end: datetime, project: str | None = None
+) -> list[dict]:
+    """Return tasks started in [start, end), newest first."""
+    conn = _get_conn()
+    if project:
+        rows = conn.execute(
+            "SELECT * FROM tasks WHERE project = ? "
+            "AND started_ts >= ? AND started_ts < ? ORDER BY started_ts DESC",
+            (project, _epoch(start), _epoch(end)),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM tasks WHERE started_ts >= ? AND started_ts < ? "
+            "ORDER BY started_ts DESC",
+            (_epoch(start), _epoch(end)),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# ---------------------------------------------------------------------------
+# Event archive (monthly files next to the hot database)
+# ---------------------------------------------------------------------------
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# SQLite allows 10 attached databases by default
+_MAX_ATTACH = 8
+
+
+def _archive_path(month: str) -> Path:
+    """Archive file for a YYYY-MM month."""
+    return config.EVENT_ARCHIVE_DIR / f"precept-events-{month}.db"
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def _ensure_archive_table(conn: sqlite3.Connection, schema: str):
+    """Create bot_events in an attached archive, matching the hot table."""
+    ddl = conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'bot_events'"
+    ).fetchone()[0]
+    conn.execute(
+        ddl.replace("CREATE TABLE bot_events", f"CREATE TABLE IF NOT EXISTS {schema}.bot_events", 1)
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {schema}.idx_bot_events_created "
+        "ON bot_events (created_at)"
+    )
+    # Columns added to the hot table after this archive was created
+    have = {r["name"] for r in conn.execute(f"PRAGMA {schema}.table_info(bot_events)")}
+    for col in conn.execute("PRAGMA main.table_info(bot_events)"):
+        if col["name"] not in have:
+            conn.execute(f"ALTER TABLE {schema}.bot_events ADD COLUMN {col['name']} {col['type']}")
+    if "created_ts" not in have:
+        conn.execute(
+            f"UPDATE {schema}.bot_events "
+            "SET created_ts = CAST(strftime('%s', created_at, 'utc') AS INTEGER)"
+        )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {schema}.idx_bot_events_created_ts "
+        "ON bot_events (created_ts)"
+    )
+
+
+def archive_events(older_than_days: int) -> int:
+    """Move bot_events older than N days into monthly archive files.
+
+    Rows keep their ids, so re-running after an interrupted move is safe.
+    Returns the number of rows moved.
+    """
+    flush_events()
+    conn = _get_conn()
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime(_TS_FORMAT)
+    months = [
+        r[0]
+        for r in conn.execute(
+            "SELECT DISTINCT substr(created_at, 1, 7) FROM bot_events WHERE created_at < ?",
+            (cutoff,),
+        ).fetchall()
+    ]
+    if not months:
+        return 0
+
+    config.EVENT_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    cols = ", ".join(r["name"] for r in conn.execute("PRAGMA main.table_info(bot_events)"))
+    moved = 0
+    for month in months:
+        lo, hi = f"{month}-01 00:00:00", min(f"{_next_month(month)}-01 00:00:00", cutoff)
+        conn.execute("ATTACH DATABASE ? AS arc", (str(_archive_path(month)),))
+        try:
+            with conn:
+                _ensure_archive_table(conn, "arc")
+                conn.execute(
+                    f"INSERT OR IGNORE INTO arc.bot_events ({cols}) "
+                    f"SELECT {cols} FROM main.bot_events "
+                    "WHERE created_at >= ? AND created_at < ?",
+                    (lo, hi),
+                )
+                cur = conn.execute(
+                    "DELETE FROM main.bot_events WHERE created_at >= ? AND created_at < ?",
+                    (lo, hi),
+                )
+                moved += cur.rowcount
+        finally:
+            conn.execute("DETACH DATABASE arc")
+        logger.info("Archived %d events from %s", cur.rowcount, month)
+    return moved
+
+
+def _archive_months(start: datetime, end: datetime) -> list[str]:
+    """Months overlapping [start, end) that have an archive file."""
+    lo, hi = start.strftime(_TS_FORMAT), end.strftime(_TS_FORMAT)
+    months, month = [], lo[:7]
+    while month <= hi[:7]:
+        if _archive_path(month).exists():
+            months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def _attached_archives(conn: sqlite3.Connection, months: list[str]):
+    """Yield schema names for months, at most _MAX_ATTACH attached at a time.
+
+    Each batch is detached before the next is attached; consume the
+    generator fully (a plain for loop) so the last batch is detached too.
+    """
+    for i in range(0, len(months), _MAX_ATTACH):
+        chunk = months[i : i + _MAX_ATTACH]
+        schemas = [f"arc{n}" for n in range(len(chunk))]
+        for schema, m in zip(schemas, chunk):
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(_archive_path(m)),))
+        try:
+            with conn:
+                # Archives written before migration 8 lack created_ts
+                for schema in schemas:
+                    _ensure_archive_table(conn, schema)
+            yield schemas
+        finally:
+            for schema in schemas:
+                conn.execute(f"DETACH DATABASE {schema}")
+
+
+def _events_where(start: datetime, end: datetime, project: str | None) -> tuple[str, list]:
+    where = "created_ts >= ? AND created_ts < ?"
+    params = [_epoch(start), _epoch(end)]
+    if project:
+        where += " AND project = ?"
+        params.append(project)
+    return where, params
+
+
+def events_between(
+    start: datetime,
+    end: datetime,
+    project: str | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Return events in [start, end), newest first, from hot and archived data.
+
+    Only archive files whose month overlaps the range are attached. Use
+    count_events_between() when only the number is needed.
+    """
+    flush_events()
+    where, params = _events_where(start, end, project)
+    order = " ORDER BY created_ts DESC" + (f" LIMIT {int(limit)}" if limit else "")
+
+    conn = _get_conn()
+    rows = [
+        dict(r)
+        for r in conn.execute(
+            f"SELECT id, event_type, detail, project, created_at, created_ts FROM main.bot_events "
+            f"WHERE {where}{order}",
+            params,
+        ).fetchall()
+    ]
+    for schemas in _attached_archives(conn, _archive_months(start, end)):
+        union = " UNION ALL ".join(
+            f"SELECT id, event_type, detail, project, created_at, created_ts "
+            f"FROM {schema}.bot_events WHERE {where}"
+            for schema in schemas
+        )
+        rows += [
+            dict(r)
+            for r in conn.execute(
+                f"SELECT * FROM ({union}){order}", params * len(schemas)
+            ).fetchall()
+        ]
+
+    rows.sort(key=lambda r: r["created_ts"], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def count_events_between(start: datetime, end: datetime, project: str | None = None) -> int:
+    """Number of events in [start, end), hot and archived, without loading them."""
+    flush_events()
+    where, params = _events_where(start, end, project)
+    conn = _get_conn()
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM main.bot_events WHERE {where}", params
+    ).fetchone()[0]
+    for schemas in _attached_archives(conn, _archive_months(start, end)):
+        union = " UNION ALL ".join(
+            f"SELECT COUNT(*) AS n FROM {schema}.bot_events WHERE {where}" for schema in schemas
+        )
+        total += conn.execute(
+            f"SELECT SUM(n) FROM ({union})", params * len(schemas)
+        ).fetchone()[0]
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Maintenance (run off-hours from the bot's JobQueue)
+# ---------------------------------------------------------------------------
+
+# Free pages released per incremental_vacuum step
+VACUUM_STEP_PAGES = 256
+# Conservative VACUUM rewrite rate (SD card), used to decide whether the
+# one-off switch to incremental auto_vacuum fits in the maintenance budget
+VACUUM_BYTES_PER_SECOND = 10 * 1024 * 1024
+
+
+def _file_sizes(conn: sqlite3.Connection) -> dict:
+    wal = Path(f"{config.DB_PATH}-wal")
+    return {
+        "db_bytes": config.DB_PATH.stat().st_size if config.DB_PATH.exists() else 0,
+        "wal_bytes": wal.stat().st_size if wal.exists() else 0,
+        "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+
+def maintain(budget_seconds: float) -> dict:
+    """Optimize, checkpoint and incrementally vacuum the database.
+
+    Steps run in order and no new step starts once budget_seconds have
+    passed. A database not yet in auto_vacuum=INCREMENTAL mode is switched
+    over with a one-off VACUUM, but only once the estimated rewrite time
+    fits in what is left of the budget; until then the step is logged as
+    "vacuum-deferred". Returns sizes before and after plus the steps that
+    ran.
+    """
+    flush_events()
+    conn = _get_conn()
+    deadline = time.monotonic() + budget_seconds
+    before = _file_sizes(conn)
+    done = []
+
+    conn.execute("PRAGMA optimize")
+    done.append("optimize")
+
+    incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    if not incremental and time.monotonic() < deadline:
+        # VACUUM rewrites every live page and cannot be interrupted
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        size = conn.execute("PRAGMA page_size").fetchone()[0]
+        estimate = (pages - free) * size / VACUUM_BYTES_PER_SECOND
+        if estimate <= deadline - time.monotonic():
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            done.append("vacuum")
+            incremental = True
+        else:
+            done.append("vacuum-deferred")
+            logger.warning(
+                "DB maintenance: switching to incremental vacuum needs a full VACUUM "
+                "(about %.0fs), over the %.0fs budget; see deploy/README.md",
+                estimate, budget_seconds,
+            )
+
+    if time.monotonic() < deadline:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        done.append("checkpoint" if not busy else "checkpoint-busy")
+
+    # Without incremental mode the pragma frees nothing
+    start_free = free = conn.execute("PRAGMA freelist_count").fetchone()[0] if incremental else 0
+    while free and time.monotonic() < deadline:
+        # executescript steps the pragma to completion; execute() frees one page
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    freed = start_free - free
+    if freed:
+        done.append(f"incremental_vacuum({freed})")
+        # Vacuumed pages went through the WAL; hand the space back
+        if time.monotonic() < deadline:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    after = _file_sizes(conn)
+    logger.info(
+        "DB maintenance (%s): db %d -> %d bytes, wal %d -> %d bytes, free pages %d -> %d",
+        ", ".join(done),
+        before["db_bytes"], after["db_bytes"],
+        before["wal_bytes"], after["wal_bytes"],
+        before["free_pages"], after["free_pages"],
+    )
+    return {"steps": done, "before": before, "after": after}
@@ -0,0 +1,174 @@
+"""Typo-tolerant ranked matching of project names.
+
+Names are indexed by their character trigrams, so a query only scores
+names that share at least one trigram with it, and a misspelt or partial
+name ("smtih netwrk", "smith") still finds "smith-network". Scores can be
+weighted by how recently each project was used.
+"""
+
+import heapq
+import math
+import re
+import time
+from typing import Callable
+
+_SEPARATORS = re.compile(r"[\s_\-.]+")
+
+
+def _normalise(text: str) -> str:
+    return _SEPARATORS.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of each word, padded so short words and word starts count."""
+    grams = set()
+    for word in _normalise(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# A project used just now scores up to this much higher than a dormant one
+RECENCY_WEIGHT = 0.3
+RECENCY_HALF_LIFE_DAYS = 14
+# Candidates below this similarity (Dice coefficient) are noise
+MIN_SIMILARITY = 0.2
+# Only this many best text matches are weighed for recency, so a common
+# word matching hundreds of names costs no more than a rare one
+RECENCY_CANDIDATES = 32
+
+
+class TrigramIndex:
+    """Inverted trigram index over a fixed list of names."""
+
+    def __init__(self, names: list[str]):
+        # Sorted, so equal scores fall back to name order via the position
+        # (among the names search() reaches, which favours shorter ones)
+        self.names = sorted(names)
+        self._norm = [_normalise(n) for n in self.names]
+        self._lower = [n.lower() for n in self.names]
+        self._grams = [frozenset(trigrams(n)) for n in self.names]
+        self._sizes = [len(g) for g in self._grams]
+        self._postings: dict[str, list[int]] = {}
+        for i, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+        # Fewest trigrams first: past the query's own size, names further
+        # down a list can only score lower (see search)
+        for ids in self._postings.values():
+            ids.sort(key=self._sizes.__getitem__)
+
+    def containing(self, text: str) -> list[str]:
+        """Names containing text, ignoring case, in name order."""
+        needle = text.lower()
+        # Such a name holds every in-word trigram of text
+        core = sorted(
+            (self._postings.get(g, ()) for g in trigrams(text) if " " not in g), key=len
+        )
+        if core:
+            ids = set(core[0]).intersection(*core[1:])
+        else:
+            ids = range(len(self.names))
+        return [self.names[i] for i in sorted(ids) if needle in self._lower[i]]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        last_used: Callable[[str], float | None] | None = None,
+    ) -> list[tuple[str, float]]:
+        """The k best (name, score) matches for query, best first.
+
+        last_used(name) gives the Unix time a name was last used (or None);
+        the RECENCY_CANDIDATES best text matches are boosted by up to
+        RECENCY_WEIGHT when recently used.
+        """
+        grams = frozenset(trigrams(query))
+        if not grams or k <= 0:
+            return []
+        n_query = len(grams)
+        # A name containing the query holds all of its in-word trigrams
+        n_core = sum(1 for g in grams if " " not in g)
+        norm_query = _normalise(query)
+        keep = max(k, RECENCY_CANDIDATES) if last_used else k
+
+        def bound(shared, size, substring):
+            """Best score for a name of size trigrams sharing shared of them."""
+            score = 2 * shared / (n_query + size)
+            return max(score, 0.5) + 0.25 if substring else score
+
+        grams_of, sizes, norms = self._grams, self._sizes, self._norm
+        boost = 1 + RECENCY_WEIGHT if last_used else 1
+        scores: dict[int, float] = {}
+        # Min-heaps of the best k and best `keep` text scores so far
+        top_k: list[float] = []
+        top: list[float] = []
+
+        def beaten(best_possible):
+            # Once enough matches are in hand, a tie cannot displace them
+            if len(top_k) < k:
+                return best_possible < MIN_SIMILARITY
+            if best_possible * boost <= top_k[0]:
+                return True
+            return len(top) == keep and best_possible <= top[0]
+
+        def push(heap, size, score):
+            if len(heap) < size:
+                heapq.heappush(heap, score)
+            elif score > heap[0]:
+                heapq.heapreplace(heap, score)
+
+        # Rarest trigrams first. A name first met in list j shares at most
+        # the n_query - j trigrams not yet read, and within a list, past
+        # that many trigrams, longer names can only score lower. A name
+        # containing the query holds every in-word trigram, so once one of
+        # those lists has been read, new names cannot be substring matches.
+        postings = sorted(
+            ((self._postings.get(g, ()), " " not in g) for g in grams),
+            key=lambda p: len(p[0]),
+        )
+        substring = True
+        for j, (ids, core) in enumerate(postings):
+            remaining = n_query - j
+            substring = substring and remaining >= n_core
+            if beaten(bound(remaining, remaining, substring)):
+                break
+            for i in ids:
+                size = sizes[i]
+                if size >= remaining and beaten(bound(remaining, size, substring)):
+                    break
+                if i in scores:
+                    continue
+                score = 2 * len(grams_of[i] & grams) / (n_query + size)
+                if substring and norm_query in norms[i]:
+                    # A clean substring beats a same-length fuzzy match
+                    score = max(score, 0.5) + 0.25
+                scores[i] = score
+                if score < MIN_SIMILARITY:
+                    continue
+                push(top_k, k, score)
+                push(top, keep, score)
+            if core:
+                substring = False
+
+        ranked = heapq.nlargest(
+            keep, ((score, -i) for i, score in scores.items() if score >= MIN_SIMILARITY)
+        )
+        if not last_used:
+            return [(self.names[-i], round(score, 3)) for score, i in ranked[:k]]
+        now = time.time()
+        decay = math.log(2) / (RECENCY_HALF_LIFE_DAYS * 86400)
+        best: list[tuple[float, int]] = []  # min-heap of (score, -position)
+        for score, i in ranked:
+            if len(best) == k and score * boost < best[0][0]:
+                # Even the full recency boost cannot lift the rest
+                break
+            used = last_used(self.names[-i])
+            if used:
+                score *= 1 + RECENCY_WEIGHT * math.exp(-decay * max(0.0, now - used))
+            if len(best) < k:
+                heapq.heappush(best, (score, i))
+            elif (score, i) > best[0]:
+                heapq.heapreplace(best, (score, i))
+        best.sort(reverse=True)
+        return [(self.names[-i], round(score, 3)) for score, i in best]
@@ -0,0 +1,105 @@
+"""Nightly incremental git maintenance across the project repositories.
+
+Every capture adds a small commit, so project repos collect loose objects
+and many small packs, and `git status` walks the whole working tree.
+run() visits the repos under PROJECTS_DIR, most recently active first,
+and for each one:
+  - writes the commit-graph
+  - packs loose objects and folds small packs into a bigger one
+    (`git maintenance` loose-objects and incremental-repack tasks)
+  - turns on the untracked cache, and the builtin fsmonitor on platforms
+    that have it
+
+A repo with captures queued or a git operation running is skipped until
+the next night, and no new repo is started once the budget has run out.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+import agit
+import config
+import gitqueue
+
+logger = logging.getLogger("precept-bot.gitmaint")
+
+# Run one at a time, in this order: incremental-repack fails on a repo
+# whose objects are all still loose. Captures for the repo can go in
+# between tasks.
+TASKS = ("loose-objects", "incremental-repack", "commit-graph")
+
+# Don't begin a repo with less than this much of the budget left
+MIN_REPO_SECONDS = 5
+
+_fsmonitor: bool | None = None  # builtin fsmonitor supported here
+
+
+async def _configure(repo: Path):
+    """One-off settings that make `git status` cheaper (idempotent)."""
+    global _fsmonitor
+    if _fsmonitor is None:
+        try:
+            await agit.run(repo, "fsmonitor--daemon", "status")
+            _fsmonitor = True
+        except agit.GitError as exc:
+            # Exit 1 just means no daemon is running for this repo yet
+            _fsmonitor = exc.returncode == 1 and "not supported" not in exc.stderr
+    await agit.run(repo, "config", "core.untrackedCache", "true")
+    if _fsmonitor:
+        await agit.run(repo, "config", "core.fsmonitor", "true")
+
+
+def _activity(repo: Path) -> float:
+    """When the repo last changed (its index is rewritten by every commit)."""
+    try:
+        return (repo / ".git" / "index").stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def busy(repo: Path) -> bool:
+    """Whether a capture is in flight for repo."""
+    return gitqueue.commits.pending(repo) or agit.repo_lock(repo).locked()
+
+
+async def run(budget_seconds: float) -> dict:
+    """Maintain project repos until budget_seconds are used up.
+
+    Returns the repo names maintained, skipped as busy, failed, and left
+    over when the budget ran out.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget_seconds
+    repos = await asyncio.to_thread(
+        lambda: sorted(
+            (p for p in config.PROJECTS_DIR.iterdir() if (p / ".git").is_dir()),
+            key=_activity,
+            reverse=True,
+        )
+    )
+    result = {"done": [], "busy": [], "failed": [], "unvisited": []}
+    start = time.monotonic()
+    for repo in repos:
+        remaining = deadline - loop.time()
+        if remaining < MIN_REPO_SECONDS:
+            result["unvisited"].append(repo.name)
+            continue
+        if busy(repo):
+            result["busy"].append(repo.name)
+            continue
+        try:
+            await _configure(repo)
+            for task in TASKS:
+                await agit.maintenance(repo, task, timeout=max(1, deadline - loop.time()))
+            result["done"].append(repo.name)
+        except agit.GitError as exc:
+            logger.warning("Git maintenance failed in %s: %s", repo.name, exc)
+            result["failed"].append(repo.name)
+    logger.info(
+        "Git maintenance: %d repos in %.1fs, %d busy, %d failed, %d left for tomorrow",
+        len(result["done"]), time.monotonic() - start,
+        len(result["busy"]), len(result["failed"]), len(result["unvisited"]),
+    )
+    return result
@@ -0,0 +1,124 @@
+"""Coalescing per-project git commits.
+
+Captures call schedule() instead of committing on the spot. Paths queued
+for the same project are held until no new path has arrived for
+GIT_COMMIT_DEBOUNCE_SECONDS (or GIT_COMMIT_MAX_DELAY_SECONDS have passed
+since the first one), then staged with a single `git add` and written as
+one commit that lists them all. A 40-photo walk-through becomes one commit
+and two git processes instead of forty commits and eighty processes.
+
+schedule() returns a future for the commit outcome; the optional notify
+hook is called once per batch so the bot can report status to the user.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+
+import agit
+import config
+
+logger = logging.getLogger("precept-bot.gitqueue")
+
+
+class _Batch:
+    """Paths waiting for one commit in one repo."""
+
+    def __init__(self, now: float):
+        self.paths: dict[Path, None] = {}  # ordered set
+        self.messages: list[str] = []
+        self.futures: list[asyncio.Future] = []
+        self.first_at = now
+        self.last_at = now
+        self.task: asyncio.Task | None = None
+
+
+def _commit_message(messages: list[str]) -> str:
+    """One line for a single capture, else a count plus one line per capture."""
+    if len(messages) == 1:
+        return messages[0]
+    return f"Add {len(messages)} captures\n\n" + "\n".join(f"- {m}" for m in messages)
+
+
+class CommitQueue:
+    """Debounced commit batches, one per project repository."""
+
+    def __init__(self, debounce: float, max_delay: float):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # async (repo, paths, ok) -> None, called once per committed batch
+        self.notify = None
+        self._batches: dict[Path, _Batch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def schedule(self, repo: Path, path: Path, message: str) -> asyncio.Future:
+        """Queue path for the next commit in repo; resolves to True on success."""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(repo)
+        if batch is None:
+            batch = self._batches[repo] = _Batch(loop.time())
+            batch.task = asyncio.create_task(self._wait_and_commit(repo, batch))
+            self._tasks.add(batch.task)
+            batch.task.add_done_callback(self._tasks.discard)
+        batch.paths[path] = None
+        batch.messages.append(message)
+        batch.last_at = loop.time()
+        future = loop.create_future()
+        batch.futures.append(future)
+        return future
+
+    def pending(self, repo: Path) -> bool:
+        """Whether repo has captures waiting for their commit."""
+        return repo in self._batches
+
+    async def _wait_and_commit(self, repo: Path, batch: _Batch):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                now = loop.time()
+                due = min(batch.last_at + self.debounce, batch.first_at + self.max_delay)
+                if now >= due:
+                    break
+                await asyncio.sleep(due - now)
+        finally:
+            # Later paths start a new batch from here on
+            if self._batches.get(repo) is batch:
+                del self._batches[repo]
+        await self._commit(repo, batch)
+
+    async def _commit(self, repo: Path, batch: _Batch):
+        paths = list(batch.paths)
+        ok = False
+        try:
+            await agit.commit_paths(repo, paths, _commit_message(batch.messages))
+            ok = True
+            logger.info("Git commit in %s: %d path(s)", repo.name, len(paths))
+        except agit.GitError as exc:
+            logger.error("Git error in %s: %s", repo.name, exc)
+        except Exception:
+            logger.exception("Unexpected error committing in %s", repo.name)
+        finally:
+            # Even a cancelled commit must not leave callers waiting
+            for future in batch.futures:
+                if not future.done():
+                    future.set_result(ok)
+        if self.notify:
+            try:
+                await self.notify(repo, paths, ok)
+            except Exception as exc:
+                logger.warning("Commit notification failed: %s", exc)
+
+    async def flush(self):
+        """Commit every pending batch now and wait for running commits."""
+        batches = list(self._batches.items())
+        self._batches.clear()
+        for _, batch in batches:
+            batch.task.cancel()
+        for repo, batch in batches:
+            await self._commit(repo, batch)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+commits = CommitQueue(
+    config.GIT_COMMIT_DEBOUNCE_SECONDS, config.GIT_COMMIT_MAX_DELAY_SECONDS
+)
@@ -7,8 +7,8 @@ All handlers receive (update, context) and use context.user_data for state:
   - page: int (for project pagination)
 """
 
+import asyncio
 import logging
-import subprocess
 import tempfile
 from datetime import datetime, timedelta, time as dt_time
 from pathlib import Path
@@ -16,9 +16,17 @@ from pathlib import Path
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
 
+import adb
+import agit
+import catalog
 import config
 import db
+import gitmaint
+import gitqueue
+import journal
+import mediastore
 import menus
+import statuscache
 
 logger = logging.getLogger("precept-bot.handlers")
 
@@ -64,42 +72,45 @@ def _reply_keyboard(ctx: ContextTypes.DEFAULT_TYPE):
     return menus.default_reply_keyboard()
 
 
-def _list_projects() -> list[str]:
-    """List project directories."""
-    return sorted(
-        p.name
-        for p in config.PROJECTS_DIR.iterdir()
-        if p.is_dir() and not p.name.startswith(".")
-    )
+async def _select_project(
+    context: ContextTypes.DEFAULT_TYPE, name: str, event: str = "project_switched"
+):
+    """Make name the active project and count it towards picker order."""
+    context.user_data["active_project"] = name
+    catalog.catalog.record_use(name)
+    await adb.log_event(event, name)
 
 
-def _fuzzy_match_project(query: str) -> str | None:
-    """Find a project directory matching the query."""
-    query_lower = query.lower()
-    candidates = _list_projects()
-    for name in candidates:
-        if name.lower() == query_lower:
-            return name
-    matches = [n for n in candidates if query_lower in n.lower()]
-    if len(matches) == 1:
-        return matches[0]
-    return None
+def _rank_projects(query: str) -> list[str]:
+    """Best fuzzy matches for query, recently used projects first on ties."""
+    return catalog.catalog.search(query, menus.PROJECT_MATCHES)
 
 
-def _git_commit(cwd: Path, filepath: Path, message: str) -> bool:
-    """Stage a file and commit."""
+def _queue_commit(cwd: Path, filepath: Path, message: str):
+    """Queue a file for the project's next batched git commit."""
     try:
-        subprocess.run(
-            ["git", "add", str(filepath)], cwd=cwd, check=True, capture_output=True
-        )
-        subprocess.run(
-            ["git", "commit", "-m", message], cwd=cwd, check=True, capture_output=True
-        )
-        logger.info("Git commit in %s: %s", cwd.name, message)
-        return True
-    except subprocess.CalledProcessError as exc:
-        logger.error("Git error in %s: %s", cwd.name, exc.stderr.decode())
-        return False
+        nbytes = filepath.lstat().st_size
+    except OSError:
+        nbytes = 0
+    catalog.catalog.touch(cwd.name, nbytes)
+    return gitqueue.commits.schedule(cwd, filepath, message)
+
+
+async def _store_media(pp: Path, path: Path):
+    """Move a captured file into the media store if it belongs there."""
+    if mediastore.should_store(path, pp):
+        await asyncio.to_thread(mediastore.store, path, pp)
+
+
+async def report_commit(bot, repo: Path, paths: list[Path], ok: bool):
+    """Tell the user how a batched capture commit went (gitqueue notify hook)."""
+    if ok:
+        text = f"Git: committed {len(paths)} file(s) to {repo.name}"
+    else:
+        text = f"Git commit failed for {len(paths)} file(s) in {repo.name}"
+    await bot.send_message(
+        chat_id=config.ALLOWED_USER_ID, text=text, disable_notification=ok
+    )
 
 
 def _safe_filename(text: str) -> str:
@@ -109,7 +120,7 @@ def _safe_filename(text: str) -> str:
     return safe or "untitled"
 
 
-def _main_menu_text(ctx: ContextTypes.DEFAULT_TYPE) -> str:
+async def _main_menu_text(ctx: ContextTypes.DEFAULT_TYPE) -> str:
     """Build the main menu header text."""
     project = _project(ctx)
     visit_id = _visit_id(ctx)
@@ -122,12 +133,12 @@ def _main_menu_text(ctx: ContextTypes.DEFAULT_TYPE) -> str:
         lines[0] += " -- No project selected"
 
     if visit_id:
-        visit = db.get_active_visit(project)
+        visit = await adb.get_active_visit(project)
         if visit:
             loc = visit.get("location") or "no location"
             lines.append(f"Site visit in progress ({loc})")
     if task_id:
-        task = db.get_active_task(project)
+        task = await adb.get_active_task(project)
         if task:
             lines.append(f"Task running: {task['description']}")
 
@@ -148,7 +159,7 @@ async def _send_long(update: Update, text: str, **kwargs):
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle /start, /help, /menu, "menu", or "0"."""
-    text = _main_menu_text(context)
+    text = await _main_menu_text(context)
     await update.message.reply_text(
         text,
         reply_markup=menus.main_menu_keyboard(_project(context)),
@@ -168,7 +179,7 @@ async def menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     data = query.data
 
     if data == menus.MENU_MAIN:
-        text = _main_menu_text(context)
+        text = await _main_menu_text(context)
         await query.edit_message_text(
             text, reply_markup=menus.main_menu_keyboard(_project(context))
         )
@@ -215,7 +226,7 @@ async def _show_project_list(
 ) -> int:
     """Show paginated project list."""
     query = update.callback_query
-    projects = _list_projects()
+    projects = catalog.catalog.ranked()
 
     if not projects:
         await query.edit_message_text("No projects found.")
@@ -241,11 +252,10 @@ async def project_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     if data.startswith(menus.PROJECT_CB):
         project_name = data[len(menus.PROJECT_CB) :]
-        context.user_data["active_project"] = project_name
-        db.log_event("project_switched", project_name)
+        await _select_project(context, project_name)
         await query.edit_message_text(f"Active project: {project_name}")
         await query.message.reply_text(
-            _main_menu_text(context),
+            await _main_menu_text(context),
             reply_markup=menus.main_menu_keyboard(project_name),
         )
         return MAIN_MENU
@@ -259,23 +269,29 @@ async def project_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def project_name_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle typed project name in SELECT_PROJECT state."""
     query_text = update.message.text.strip()
-    match = _fuzzy_match_project(query_text)
+    match = catalog.catalog.match(query_text)
 
     if match is None:
-        await update.message.reply_text(
-            f"No unique match for '{query_text}'. Tap a button or try again.",
-            reply_markup=_reply_keyboard(context),
-        )
+        candidates = _rank_projects(query_text)
+        if candidates:
+            await update.message.reply_text(
+                f"Did you mean one of these? ('{query_text}')",
+                reply_markup=menus.project_choice_keyboard(candidates),
+            )
+        else:
+            await update.message.reply_text(
+                f"No match for '{query_text}'. Tap a button or try again.",
+                reply_markup=_reply_keyboard(context),
+            )
         return SELECT_PROJECT
 
-    context.user_data["active_project"] = match
-    db.log_event("project_switched", match)
+    await _select_project(context, match)
     await update.message.reply_text(
         f"Active project: {match}",
         reply_markup=_reply_keyboard(context),
     )
     await update.message.reply_text(
-        _main_menu_text(context),
+        await _main_menu_text(context),
         reply_markup=menus.main_menu_keyboard(match),
     )
     return MAIN_MENU
@@ -284,7 +300,7 @@ async def project_name_text(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def _back_to_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Return to the main menu from a callback."""
     query = update.callback_query
-    text = _main_menu_text(context)
+    text = await _main_menu_text(context)
     await query.edit_message_text(
         text, reply_markup=menus.main_menu_keyboard(_project(context))
     )
@@ -340,14 +356,13 @@ async def new_project_text(
     project_dir = config.PROJECTS_DIR / name
     if project_dir.exists():
         # Project already exists -- just switch to it
-        context.user_data["active_project"] = name
-        db.log_event("project_switched", name)
+        await _select_project(context, name)
         await update.message.reply_text(
             f"Project already exists. Switched to: {name}",
             reply_markup=_reply_keyboard(context),
         )
         await update.message.reply_text(
-            _main_menu_text(context),
+            await _main_menu_text(context),
             reply_markup=menus.main_menu_keyboard(name),
         )
         return MAIN_MENU
@@ -357,13 +372,16 @@ async def new_project_text(
     (project_dir / "docs").mkdir()
     (project_dir / "pics").mkdir()
     (project_dir / "correspondence").mkdir()
+    catalog.catalog.invalidate()
 
     # Initialise git repo
-    subprocess.run(["git", "init"], cwd=project_dir, capture_output=True)
+    try:
+        await agit.init(project_dir)
+    except agit.GitError as exc:
+        logger.error("git init failed for %s: %s", name, exc)
     logger.info("Created new project: %s", name)
 
-    context.user_data["active_project"] = name
-    db.log_event("project_created", name)
+    await _select_project(context, name, event="project_created")
 
     await update.message.reply_text(
         f"Project created: {name}\n"
@@ -372,7 +390,7 @@ async def new_project_text(
         reply_markup=_reply_keyboard(context),
     )
     await update.message.reply_text(
-        _main_menu_text(context),
+        await _main_menu_text(context),
         reply_markup=menus.main_menu_keyboard(name),
     )
     return MAIN_MENU
@@ -383,24 +401,19 @@ async def new_project_text(
 # ---------------------------------------------------------------------------
 
 
-async def _show_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Show project status + DB stats."""
-    query = update.callback_query
-    project = _project(context)
-
-    if not project:
-        await query.edit_message_text(
-            "No active project. Select one first.",
-            reply_markup=menus.main_menu_keyboard(),
-        )
-        return
+async def _status_text(project: str) -> str:
+    """STATUS.md plus DB stats for a project, reused while neither changes."""
+    status_file = config.PROJECTS_DIR / project / "STATUS.md"
+    # Keys are taken before reading, so a change mid-render is a later miss
+    key = (statuscache.file_key(status_file), await adb.change_counter())
+    text = statuscache.status_cache.get(project, key)
+    if text is not None:
+        return text
 
     lines = [f"Status for {project}:"]
 
     # STATUS.md content
-    pp = config.PROJECTS_DIR / project
-    status_file = pp / "STATUS.md"
-    if status_file.exists():
+    if key[0] is not None:
         content = status_file.read_text().strip()
         if content:
             # Truncate if very long
@@ -411,7 +424,7 @@ async def _show_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         lines.append("No STATUS.md found.")
 
     # DB stats
-    stats = db.project_stats(project)
+    stats = await adb.project_stats(project)
     lines.append(
         f"\nDB: {stats['photos']} photos, {stats['voice_notes']} voice notes, "
         f"{stats['quick_notes']} notes, {stats['visits']} visits, "
@@ -419,11 +432,28 @@ async def _show_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
     # Active task info
-    active_task = db.get_active_task(project)
+    active_task = await adb.get_active_task(project)
     if active_task:
         lines.append(f"\nActive task: {active_task['description']} (since {active_task['started_at'][:16]})")
 
     text = "\n".join(lines)
+    statuscache.status_cache.put(project, key, text)
+    return text
+
+
+async def _show_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show project status + DB stats."""
+    query = update.callback_query
+    project = _project(context)
+
+    if not project:
+        await query.edit_message_text(
+            "No active project. Select one first.",
+            reply_markup=menus.main_menu_keyboard(),
+        )
+        return
+
+    text = await _status_text(project)
     # Can't edit_message_text if it's too long, so use reply
     if len(text) > config.MAX_MESSAGE_LENGTH:
         await query.edit_message_text("Status loading...")
@@ -542,10 +572,13 @@ async def _create_visit(
     # Ad-hoc project creation
     if pp and not pp.exists():
         pp.mkdir(parents=True)
-        subprocess.run(["git", "init"], cwd=pp, capture_output=True)
+        try:
+            await agit.init(pp)
+        except agit.GitError as exc:
+            logger.error("git init failed for %s: %s", pp, exc)
         logger.info("Created ad-hoc project: %s", pp)
 
-    visit_id = db.start_visit(project, location, latitude, longitude)
+    visit_id = await adb.start_visit(project, location, latitude, longitude)
     context.user_data["active_visit_id"] = visit_id
 
     loc_text = f" at {location}" if location else ""
@@ -570,7 +603,7 @@ async def _end_visit_handler(
         await target.reply_text("No active visit to end.")
         return MAIN_MENU
 
-    summary_data = db.end_visit(visit_id)
+    summary_data = await adb.end_visit(visit_id)
     context.user_data["active_visit_id"] = None
 
     if summary_data:
@@ -596,7 +629,7 @@ async def _end_visit_handler(
             if summary_data["notes"]:
                 md_content += f"\n## Notes\n\n{summary_data['notes']}\n"
             summary_file.write_text(md_content)
-            _git_commit(pp, summary_file, f"Add site visit summary: {summary_file.name}")
+            _queue_commit(pp, summary_file, f"Add site visit summary: {summary_file.name}")
 
         target = update.callback_query.message if update.callback_query else update.message
         await target.reply_text(
@@ -634,7 +667,7 @@ async def _start_task_flow(
     # Check for already-active task
     active = _task_id(context)
     if active:
-        task = db.get_active_task(project)
+        task = await adb.get_active_task(project)
         if task:
             await query.edit_message_text(
                 f"Task already running: {task['description']}\n"
@@ -655,7 +688,7 @@ async def task_description_text(
     project = _project(context)
     visit_id = _visit_id(context)
 
-    task_id = db.start_task(project, description, visit_id)
+    task_id = await adb.start_task(project, description, visit_id)
     context.user_data["active_task_id"] = task_id
 
     await update.message.reply_text(
@@ -677,7 +710,7 @@ async def task_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
             await query.edit_message_text("No active task to finish.")
             return MAIN_MENU
 
-        result = db.end_task(task_id)
+        result = await adb.end_task(task_id)
         context.user_data["active_task_id"] = None
 
         if result:
@@ -689,7 +722,7 @@ async def task_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
             await query.edit_message_text("Task finished.")
 
         await query.message.reply_text(
-            _main_menu_text(context),
+            await _main_menu_text(context),
             reply_markup=menus.main_menu_keyboard(_project(context)),
         )
         return MAIN_MENU
@@ -702,6 +735,19 @@ async def task_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 # ---------------------------------------------------------------------------
 
 
+async def _save_quick_note(pp: Path, note: str) -> Path:
+    """Append a note to today's quick-note file and queue its commit."""
+    note_file = await asyncio.to_thread(journal.notes.append, pp, note)
+    day = note_file.name.split("_", 1)[0]
+    _queue_commit(pp, note_file, f"Add quick note: {day}")
+    return note_file
+
+
+async def sync_journal(context: ContextTypes.DEFAULT_TYPE):
+    """fsync quick notes written since the last sync (JOURNAL_FSYNC=interval)."""
+    await asyncio.to_thread(journal.notes.sync)
+
+
 async def quick_note_text(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> int:
@@ -717,24 +763,11 @@ async def quick_note_text(
     pp = _project_path(context)
 
     # Save to correspondence
-    corr_dir = pp / "correspondence"
-    corr_dir.mkdir(exist_ok=True)
-    date_str = datetime.now().strftime(config.DATE_FORMAT)
-    time_str = datetime.now().strftime("%H:%M")
-
-    note_file = corr_dir / f"{date_str}_quick-note.md"
-    # Append if file exists for today
-    if note_file.exists():
-        existing = note_file.read_text()
-        note_file.write_text(f"{existing}\n**{time_str}:** {note}\n")
-    else:
-        note_file.write_text(f"# Quick Notes -- {date_str}\n\n**{time_str}:** {note}\n")
-
-    _git_commit(pp, note_file, f"Add quick note: {date_str}")
+    note_file = await _save_quick_note(pp, note)
 
     # Log to DB
     visit_id = _visit_id(context)
-    db.log_quick_note(project, note, visit_id)
+    await adb.log_quick_note(project, note, visit_id)
 
     await update.message.reply_text(
         f"Note saved to {project}/correspondence/{note_file.name}",
@@ -767,28 +800,14 @@ async def note_save_callback(
     pp = _project_path(context)
 
     # Save to correspondence file
-    corr_dir = pp / "correspondence"
-    corr_dir.mkdir(exist_ok=True)
-    date_str = datetime.now().strftime(config.DATE_FORMAT)
-    time_str = datetime.now().strftime("%H:%M")
-
-    note_file = corr_dir / f"{date_str}_quick-note.md"
-    if note_file.exists():
-        existing = note_file.read_text()
-        note_file.write_text(f"{existing}\n**{time_str}:** {note_text}\n")
-    else:
-        note_file.write_text(
-            f"# Quick Notes -- {date_str}\n\n**{time_str}:** {note_text}\n"
-        )
-
-    _git_commit(pp, note_file, f"Add quick note: {date_str}")
-    db.log_quick_note(project, note_text)
+    note_file = await _save_quick_note(pp, note_text)
+    await adb.log_quick_note(project, note_text)
 
     await query.edit_message_text(
         f"Note saved to {project}/correspondence/{note_file.name}"
     )
     await query.message.reply_text(
-        _main_menu_text(context),
+        await _main_menu_text(context),
         reply_markup=menus.main_menu_keyboard(project),
     )
     return MAIN_MENU
@@ -802,9 +821,9 @@ async def note_save_callback(
 async def search_query_text(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> int:
-    """Search voice transcripts and quick notes for a keyword."""
+    """Search voice transcripts, quick notes and scan output."""
     query_text = update.message.text.strip()
-    results = db.search_transcripts(query_text)
+    results = await adb.search_transcripts(query_text)
 
     if not results:
         await update.message.reply_text(
@@ -815,19 +834,9 @@ async def search_query_text(
 
     lines = [f"Found {len(results)} result(s) for '{query_text}':\n"]
     for r in results:
-        text_content = r.get("text") or ""
-        source_tag = r.get("source", "voice")
-        idx = text_content.lower().find(query_text.lower())
-        start = max(0, idx - 40)
-        end = min(len(text_content), idx + len(query_text) + 40)
-        snippet = text_content[start:end]
-        if start > 0:
-            snippet = "..." + snippet
-        if end < len(text_content):
-            snippet = snippet + "..."
-
+        snippet = " ".join(r["snippet"].split())
         lines.append(
-            f"[{r['project']}] {r['created_at'][:10]} ({source_tag})\n"
+            f"[{r['project']}] {r['created_at'][:10]} ({r['source']})\n"
             f"  {snippet}\n"
         )
 
@@ -845,7 +854,7 @@ async def _show_recent_activity(
 ):
     """Show recent bot events."""
     query = update.callback_query
-    events = db.recent_activity(15)
+    events = await adb.recent_activity(15)
 
     if not events:
         await query.edit_message_text(
@@ -894,18 +903,19 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
     photo = update.message.photo[-1]
     file = await context.bot.get_file(photo.file_id)
+    mediastore.unlink_pointer(dest)
     await file.download_to_drive(str(dest))
     logger.info("Photo saved: %s", dest)
+    await _store_media(pp, dest)
 
-    committed = _git_commit(pp, dest, f"Add photo: {filename}")
+    _queue_commit(pp, dest, f"Add photo: {filename}")
 
     # DB logging
     visit_id = _visit_id(context)
-    db.log_photo(project, str(dest), caption, visit_id=visit_id)
+    await adb.log_photo(project, str(dest), caption, visit_id=visit_id)
 
-    status = "saved + committed" if committed else "saved (git commit failed)"
     await update.message.reply_text(
-        f"Photo {status}: pics/{filename}",
+        f"Photo saved: pics/{filename} (commit queued)",
         reply_markup=_reply_keyboard(context),
     )
     return MAIN_MENU
@@ -968,15 +978,14 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     md_path.write_text(content)
     logger.info("Voice transcript saved: %s", md_path)
 
-    committed = _git_commit(pp, md_path, f"Add voice transcript: {md_path.name}")
+    _queue_commit(pp, md_path, f"Add voice transcript: {md_path.name}")
 
     # DB logging
     visit_id = _visit_id(context)
-    db.log_voice(project, str(md_path), text, visit_id)
+    await adb.log_voice(project, str(md_path), text, visit_id)
 
-    status = "transcribed + committed" if committed else "transcribed (git commit failed)"
     await update.message.reply_text(
-        f"{status}: correspondence/{md_path.name}",
+        f"Transcribed: correspondence/{md_path.name} (commit queued)",
         reply_markup=_reply_keyboard(context),
     )
     await _send_long(update, text)
@@ -1007,7 +1016,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     # File size check
     if doc.file_size and doc.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
-        db.log_event("file_rejected", f"Too large: {doc.file_size} bytes", project)
+        await adb.log_event("file_rejected", f"Too large: {doc.file_size} bytes", project)
         await update.message.reply_text(
             f"File too large (max {MAX_FILE_SIZE_MB}MB).",
             reply_markup=_reply_keyboard(context),
@@ -1019,7 +1028,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Dangerous extension check
     ext = Path(original_name).suffix.lower()
     if ext in BLOCKED_EXTENSIONS:
-        db.log_event("file_rejected", f"Blocked extension: {ext}", project)
+        await adb.log_event("file_rejected", f"Blocked extension: {ext}", project)
         await update.message.reply_text(
             f"File type {ext} not allowed.",
             reply_markup=_reply_keyboard(context),
@@ -1043,21 +1052,22 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     dest = dest_dir / f"{date_str}-{safe_name}{ext}"
 
     file = await context.bot.get_file(doc.file_id)
+    mediastore.unlink_pointer(dest)
     await file.download_to_drive(str(dest))
     logger.info("Document saved: %s", dest)
+    await _store_media(pp, dest)
 
-    committed = _git_commit(pp, dest, f"Add document: {dest.name}")
+    _queue_commit(pp, dest, f"Add document: {dest.name}")
 
     # Log as a scan if it's a network-type file
     visit_id = _visit_id(context)
     if subdir == "docs/network":
-        db.log_scan(project, "file", str(dest), visit_id=visit_id)
+        await adb.log_scan(project, "file", str(dest), visit_id=visit_id)
     else:
-        db.log_event("document_saved", str(dest), project)
+        await adb.log_event("document_saved", str(dest), project)
 
-    status = "saved + committed" if committed else "saved (git commit failed)"
     await update.message.reply_text(
-        f"Document {status}: {subdir}/{dest.name}",
+        f"Document saved: {subdir}/{dest.name} (commit queued)",
         reply_markup=_reply_keyboard(context),
     )
     return MAIN_MENU
@@ -1129,32 +1139,7 @@ async def _status_text_handler(
         )
         return MAIN_MENU
 
-    pp = config.PROJECTS_DIR / project
-    lines = [f"Status for {project}:"]
-
-    status_file = pp / "STATUS.md"
-    if status_file.exists():
-        content = status_file.read_text().strip()
-        if content:
-            if len(content) > 2000:
-                content = content[:2000] + "\n... (truncated)"
-            lines.append(f"\n{content}")
-    else:
-        lines.append("No STATUS.md found.")
-
-    stats = db.project_stats(project)
-    lines.append(
-        f"\nDB: {stats['photos']} photos, {stats['voice_notes']} voice notes, "
-        f"{stats['quick_notes']} notes, {stats['visits']} visits, "
-        f"{stats['scans']} scans, {stats['total_task_hours']}h tracked"
-    )
-
-    # Active task info
-    active_task = db.get_active_task(project)
-    if active_task:
-        lines.append(f"\nActive task: {active_task['description']} (since {active_task['started_at'][:16]})")
-
-    await _send_long(update, "\n".join(lines), reply_markup=_reply_keyboard(context))
+    await _send_long(update, await _status_text(project), reply_markup=_reply_keyboard(context))
     return MAIN_MENU
 
 
@@ -1162,7 +1147,7 @@ async def _projects_text_handler(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> int:
     """Handle 'Projects' from reply keyboard -- show as inline buttons."""
-    projects = _list_projects()
+    projects = catalog.catalog.ranked()
     if not projects:
         await update.message.reply_text("No projects found.")
         return MAIN_MENU
@@ -1183,7 +1168,7 @@ async def _end_visit_text(
         )
         return MAIN_MENU
 
-    summary_data = db.end_visit(visit_id)
+    summary_data = await adb.end_visit(visit_id)
     context.user_data["active_visit_id"] = None
 
     if summary_data:
@@ -1208,7 +1193,7 @@ async def _end_visit_text(
             if summary_data["notes"]:
                 md_content += f"\n## Notes\n\n{summary_data['notes']}\n"
             summary_file.write_text(md_content)
-            _git_commit(pp, summary_file, f"Add site visit summary: {summary_file.name}")
+            _queue_commit(pp, summary_file, f"Add site visit summary: {summary_file.name}")
 
         await update.message.reply_text(
             f"Visit ended.\n\n{summary_data['summary']}",
@@ -1235,7 +1220,7 @@ async def _start_task_text(
 
     active = _task_id(context)
     if active:
-        task = db.get_active_task(project)
+        task = await adb.get_active_task(project)
         if task:
             await update.message.reply_text(
                 f"Task already running: {task['description']}\n"
@@ -1269,17 +1254,23 @@ async def cmd_project(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         return MAIN_MENU
 
     query = " ".join(context.args)
-    match = _fuzzy_match_project(query)
+    match = catalog.catalog.match(query)
 
     if match is None:
-        await update.message.reply_text(
-            f"No unique match for '{query}'. Try /projects or tap Projects.",
-            reply_markup=_reply_keyboard(context),
-        )
+        candidates = _rank_projects(query)
+        if candidates:
+            await update.message.reply_text(
+                f"Did you mean one of these? ('{query}')",
+                reply_markup=menus.project_choice_keyboard(candidates),
+            )
+        else:
+            await update.message.reply_text(
+                f"No match for '{query}'. Try /projects or tap Projects.",
+                reply_markup=_reply_keyboard(context),
+            )
         return MAIN_MENU
 
-    context.user_data["active_project"] = match
-    db.log_event("project_switched", match)
+    await _select_project(context, match)
     await update.message.reply_text(
         f"Active project: {match}",
         reply_markup=_reply_keyboard(context),
@@ -1301,7 +1292,7 @@ async def cmd_visit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle /visit -- start or check visit status."""
     visit_id = _visit_id(context)
     if visit_id:
-        visit = db.get_active_visit(_project(context))
+        visit = await adb.get_active_visit(_project(context))
         if visit:
             loc = visit.get("location") or "no location"
             await update.message.reply_text(
@@ -1342,7 +1333,7 @@ async def cmd_endtask(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         )
         return MAIN_MENU
 
-    result = db.end_task(task_id)
+    result = await adb.end_task(task_id)
     context.user_data["active_task_id"] = None
 
     if result:
@@ -1372,7 +1363,7 @@ async def cmd_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 async def cmd_recent(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle /recent -- show recent activity."""
-    events = db.recent_activity(15)
+    events = await adb.recent_activity(15)
     if not events:
         await update.message.reply_text(
             "No recent activity.", reply_markup=_reply_keyboard(context)
@@ -1393,7 +1384,7 @@ async def cmd_recent(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 async def cmd_visits(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle /visits -- show visit history."""
     project = _project(context)
-    visits = db.visit_history(project, limit=10)
+    visits = await adb.visit_history(project, limit=10)
 
     if not visits:
         await update.message.reply_text(
@@ -1413,6 +1404,49 @@ async def cmd_visits(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     return MAIN_MENU
 
 
+async def cmd_perf(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle /perf [db] -- show event-loop stalls or the top DB offenders."""
+    if context.args and context.args[0].lower() == "db":
+        return await _perf_db(update, context)
+
+    s = adb.stall_monitor.snapshot()
+    lines = [
+        "Event loop lag:",
+        f"  p50 {s['p50_ms']} ms, p99 {s['p99_ms']} ms, max {s['max_ms']} ms",
+        f"  {s['stalls']} stall(s) >= {config.LOOP_STALL_WARN_MS} ms "
+        f"in {s['samples']} samples",
+        "\n/perf db for query timings",
+    ]
+    await update.message.reply_text("\n".join(lines), reply_markup=_reply_keyboard(context))
+    return MAIN_MENU
+
+
+async def _perf_db(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Top queries by total time, plus the slowest logged statements."""
+    stats = await adb.run(db.query_stats)
+    slow = await adb.slow_queries(5)
+
+    lines = ["Top queries by total time:"]
+    for q in stats[:10]:
+        lines.append(
+            f"{q['name']}\n  {q['count']}x, avg {q['avg_ms']} ms, "
+            f"p99 <= {q['p99_ms']} ms, max {q['max_ms']} ms"
+        )
+    if not stats:
+        lines.append("  (no queries yet)")
+
+    lines.append(f"\nSlowest statements (>= {config.SLOW_QUERY_MS:.0f} ms):")
+    for q in slow:
+        lines.append(f"{q['created_at'][:16]} {q['name']} {q['duration_ms']:.0f} ms")
+        if q["query_plan"]:
+            lines.append(f"  {q['query_plan'].replace(chr(10), '; ')[:120]}")
+    if not slow:
+        lines.append("  (none logged)")
+
+    await _send_long(update, "\n".join(lines), reply_markup=_reply_keyboard(context))
+    return MAIN_MENU
+
+
 # ---------------------------------------------------------------------------
 # Daily reminders
 # ---------------------------------------------------------------------------
@@ -1428,14 +1462,13 @@ async def morning_briefing(context: ContextTypes.DEFAULT_TYPE):
     if not project:
         return
 
-    stats = db.project_stats(project)
-    active_task = db.get_active_task(project)
-    active_visit = db.get_active_visit(project)
+    stats = await adb.project_stats(project)
+    active_task = await adb.get_active_task(project)
+    active_visit = await adb.get_active_visit(project)
 
     # Recent activity from last 24 hours
-    events = db.recent_activity(limit=20)
-    yesterday = (datetime.now() - timedelta(hours=24)).isoformat()
-    recent = [e for e in events if e["created_at"] >= yesterday]
+    now = datetime.now()
+    recent = await adb.count_events_between(now - timedelta(hours=24), now)
 
     lines = [f"Good morning. Daily briefing for {project}:\n"]
     lines.append(
@@ -1451,7 +1484,7 @@ async def morning_briefing(context: ContextTypes.DEFAULT_TYPE):
         lines.append(f"\nVisit in progress: {loc} (started {active_visit['started_at'][:16]})")
 
     if recent:
-        lines.append(f"\nLast 24h: {len(recent)} events")
+        lines.append(f"\nLast 24h: {recent} events")
     else:
         lines.append("\nNo activity in the last 24 hours.")
 
@@ -1461,6 +1494,10 @@ async def morning_briefing(context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+# Events listed in the afternoon wrap-up (the rest are only counted)
+WRAPUP_EVENTS = 10
+
+
 async def afternoon_wrapup(context: ContextTypes.DEFAULT_TYPE):
     """4:30 PM SAST afternoon wrap-up."""
     if not context.bot_data.get("reminders_enabled", True):
@@ -1470,19 +1507,19 @@ async def afternoon_wrapup(context: ContextTypes.DEFAULT_TYPE):
     if not project:
         return
 
-    stats = db.project_stats(project)
-    active_task = db.get_active_task(project)
+    stats = await adb.project_stats(project)
+    active_task = await adb.get_active_task(project)
 
     # Today's activity
-    events = db.recent_activity(limit=30)
-    today = datetime.now().strftime("%Y-%m-%d")
-    todays = [e for e in events if e["created_at"].startswith(today)]
+    day_start, day_end = db.day_range()
+    n_today = await adb.count_events_between(day_start, day_end)
+    todays = await adb.events_between(day_start, day_end, limit=WRAPUP_EVENTS) if n_today else []
 
     lines = [f"Afternoon wrap-up for {project}:\n"]
 
-    if todays:
-        lines.append(f"Today: {len(todays)} events")
-        for e in todays[:10]:
+    if n_today:
+        lines.append(f"Today: {n_today} events")
+        for e in todays:
             tag = f" [{e['project']}]" if e["project"] and e["project"] != project else ""
             lines.append(f"  {e['created_at'][11:16]} {e['event_type']}{tag}")
     else:
@@ -1492,8 +1529,7 @@ async def afternoon_wrapup(context: ContextTypes.DEFAULT_TYPE):
         lines.append(f"\nReminder: task still running -- {active_task['description']}")
 
     # Visit summaries from today
-    visits = db.visit_history(project, limit=5)
-    todays_visits = [v for v in visits if v["started_at"].startswith(today)]
+    todays_visits = await adb.visits_between(day_start, day_end, project)
     if todays_visits:
         lines.append(f"\nVisits today: {len(todays_visits)}")
         for v in todays_visits:
@@ -1528,6 +1564,38 @@ async def cmd_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     return MAIN_MENU
 
 
+# ---------------------------------------------------------------------------
+# Database jobs
+# ---------------------------------------------------------------------------
+
+
+async def flush_event_log(context: ContextTypes.DEFAULT_TYPE):
+    """Write buffered bot_events so idle periods don't hold them in memory."""
+    await adb.flush_events()
+
+
+async def archive_old_events(context: ContextTypes.DEFAULT_TYPE):
+    """Move old bot_events into monthly archive files."""
+    moved = await adb.archive_events(config.EVENT_RETENTION_DAYS)
+    if moved:
+        logger.info(
+            "Archived %d events older than %d days",
+            moved,
+            config.EVENT_RETENTION_DAYS,
+        )
+
+
+async def db_maintenance(context: ContextTypes.DEFAULT_TYPE):
+    """Nightly PRAGMA optimize, WAL checkpoint and incremental vacuum."""
+    await adb.maintain(config.DB_MAINTENANCE_BUDGET_SECONDS)
+
+
+async def git_maintenance(context: ContextTypes.DEFAULT_TYPE):
+    """Nightly repo maintenance, then re-measure project disk usage."""
+    await gitmaint.run(config.GIT_MAINTENANCE_BUDGET_SECONDS)
+    await catalog.catalog.refresh_usage()
+
+
 # ---------------------------------------------------------------------------
 # Fallback / cancel
 # ---------------------------------------------------------------------------
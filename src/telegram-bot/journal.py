@@ -0,0 +1,138 @@
+"""Append-only writer for the daily quick-note files.
+
+Each project's notes for a day go to correspondence/YYYY-MM-DD_quick-note.md.
+Instead of reading and rewriting the whole file for every note, the
+journal keeps the current day's file open in append mode per project
+(up to MAX_OPEN projects) and writes only the new entry. The file
+written is the same as before: a heading, then one "**HH:MM:** note"
+entry per note, separated by blank lines.
+
+Every append is flushed to the OS, so the queued git commit sees it.
+Whether and when it is fsynced follows JOURNAL_FSYNC. A handle is
+reopened when the day rolls over or the file was replaced or removed
+underneath it (a git checkout, say).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+logger = logging.getLogger("precept-bot.journal")
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class _Handle:
+    def __init__(self, path: Path, day: str):
+        self.path = path
+        self.day = day
+        self.file = open(path, "a", encoding="utf-8")
+        self.ino = os.fstat(self.file.fileno()).st_ino
+        self.dirty = False  # written since the last fsync
+
+    def stale(self, day: str) -> bool:
+        if day != self.day:
+            return True
+        try:
+            return os.stat(self.path).st_ino != self.ino
+        except OSError:
+            return True
+
+    def sync(self):
+        if self.dirty:
+            os.fsync(self.file.fileno())
+            self.dirty = False
+
+    def close(self):
+        try:
+            self.sync()
+        finally:
+            self.file.close()
+
+
+class Journal:
+    """Open daily note files, one per project, written append-only.
+
+    Methods block on file I/O and are safe to call from worker threads.
+    """
+
+    MAX_OPEN = 8
+
+    def __init__(self, fsync: str, fsync_seconds: float):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown journal fsync policy: {fsync}")
+        self.fsync = fsync
+        self.fsync_seconds = fsync_seconds
+        self._handles: OrderedDict[Path, _Handle] = OrderedDict()
+        self._lock = threading.Lock()
+        self._synced_at = time.monotonic()
+
+    def path_for(self, project_dir: Path, day: str) -> Path:
+        return project_dir / "correspondence" / f"{day}_quick-note.md"
+
+    def append(self, project_dir: Path, note: str, when: datetime | None = None) -> Path:
+        """Add a note to the project's file for today and return its path."""
+        when = when or datetime.now()
+        day = when.strftime(config.DATE_FORMAT)
+        entry = f"**{when.strftime('%H:%M')}:** {note}\n"
+        with self._lock:
+            handle = self._handle(project_dir, day)
+            if handle.file.tell() == 0:
+                handle.file.write(f"# Quick Notes -- {day}\n\n{entry}")
+            else:
+                handle.file.write(f"\n{entry}")
+            handle.file.flush()
+            handle.dirty = True
+            if self.fsync == "always" or (
+                self.fsync == "interval"
+                and time.monotonic() - self._synced_at >= self.fsync_seconds
+            ):
+                self._sync_all()
+        return handle.path
+
+    def _handle(self, project_dir: Path, day: str) -> _Handle:
+        handle = self._handles.get(project_dir)
+        if handle is not None and handle.stale(day):
+            del self._handles[project_dir]
+            handle.close()
+            handle = None
+        if handle is None:
+            path = self.path_for(project_dir, day)
+            path.parent.mkdir(exist_ok=True)
+            handle = self._handles[project_dir] = _Handle(path, day)
+            while len(self._handles) > self.MAX_OPEN:
+                _, oldest = self._handles.popitem(last=False)
+                oldest.close()
+        self._handles.move_to_end(project_dir)
+        return handle
+
+    def _sync_all(self):
+        for handle in self._handles.values():
+            handle.sync()
+        self._synced_at = time.monotonic()
+
+    def sync(self):
+        """fsync everything written so far (the "interval" policy's timer)."""
+        with self._lock:
+            if self.fsync != "never":
+                self._sync_all()
+
+    def close(self):
+        """Sync and close every open file (used at shutdown)."""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+            for handle in handles:
+                try:
+                    handle.close()
+                except OSError as exc:
+                    logger.warning("Closing %s failed: %s", handle.path, exc)
+
+
+notes = Journal(config.JOURNAL_FSYNC, config.JOURNAL_FSYNC_SECONDS)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Opt project repos into the media store and move their media there.
+
+Naming a project opts it in (see mediastore.py): the bot stores its new
+captures from then on. Files under pics/ and large files under docs/ are
+replaced by relative links into MEDIA_STORE_DIR, and links left absolute by
+earlier versions are rewritten, then the change is committed, one commit
+per project. --all covers only projects that have already opted in.
+Earlier commits still hold the original content; rewrite or re-clone the
+history separately if the repository itself must shrink.
+
+Clones on other machines need the objects too: run media-sync.py there.
+
+Usage:
+    python3 media-migrate.py PROJECT [PROJECT ...] [--dry-run]
+    python3 media-migrate.py --all [--dry-run]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the telegram-bot directory to path so we can import config
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+import mediastore
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def candidates(repo: Path) -> tuple[list[Path], list[Path]]:
+    """Tracked files under pics/ and docs/ to move into the store, and
+    tracked store links that still point at an absolute path."""
+    out = _git(repo, "ls-files", "-s", "-z", "--", "pics", "docs")
+    files, absolute = [], []
+    for entry in filter(None, out.split("\0")):
+        meta, _, rel = entry.partition("\t")
+        path = repo / rel
+        if meta.startswith("120"):
+            if mediastore.pointer_digest(path) and Path(os.readlink(path)).is_absolute():
+                absolute.append(path)
+        elif meta.startswith("100") and mediastore.belongs_in_store(path, repo):
+            files.append(path)
+    return files, absolute
+
+
+def migrate(repo: Path, dry_run: bool) -> int:
+    if not dry_run:
+        mediastore.enable(repo)
+    files, absolute = candidates(repo)
+    paths = files + absolute
+    if dry_run or not paths:
+        return len(paths)
+    for path in files:
+        mediastore.store(path, repo)
+    for path in absolute:
+        digest = mediastore.pointer_digest(path)
+        path.unlink()
+        path.symlink_to(mediastore.pointer_target(path, repo, digest))
+    rels = [str(p.relative_to(repo)) for p in paths]
+    _git(repo, "add", "--", ".gitignore", *rels)
+    _git(repo, "commit", "-q", "-m", f"Move {len(paths)} media file(s) to the media store")
+    return len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("projects", nargs="*", help="Project directory names")
+    parser.add_argument(
+        "--all", action="store_true", help="Every opted-in git repo in PROJECTS_DIR"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files")
+    args = parser.parse_args()
+
+    if not mediastore.enabled():
+        print("PRECEPT_MEDIA_STORE_DIR is not set", file=sys.stderr)
+        sys.exit(1)
+    if args.all:
+        repos = sorted(
+            p for p in config.PROJECTS_DIR.iterdir()
+            if (p / ".git").is_dir() and mediastore.opted_in(p)
+        )
+    elif args.projects:
+        repos = [config.PROJECTS_DIR / name for name in args.projects]
+    else:
+        parser.error("name a project or pass --all")
+
+    total = 0
+    for repo in repos:
+        if not (repo / ".git").is_dir():
+            print(f"{repo.name}: not a git repository, skipped", file=sys.stderr)
+            continue
+        try:
+            n = migrate(repo, args.dry_run)
+        except subprocess.CalledProcessError as exc:
+            print(f"{repo.name}: git failed: {exc.stderr.strip()}", file=sys.stderr)
+            continue
+        total += n
+        if n:
+            verb = "would move" if args.dry_run else "moved"
+            print(f"{repo.name}: {verb} {n} file(s)")
+    print(f"{total} file(s) {'to move' if args.dry_run else 'moved'} to {config.MEDIA_STORE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
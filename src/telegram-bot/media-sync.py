@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Make media store links resolve in a clone of an opted-in project.
+
+Sets up the untracked .media link (see mediastore.py) and lists the objects
+the project's committed links need that this machine's MEDIA_STORE_DIR
+lacks. With --from, copies them from another store with rsync; SOURCE is
+a store directory, local or remote (host:path), as MEDIA_STORE_DIR is set
+on that machine.
+
+Usage:
+    python3 media-sync.py PROJECT [PROJECT ...] [--from SOURCE] [--dry-run]
+    python3 media-sync.py --all [--from SOURCE] [--dry-run]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the telegram-bot directory to path so we can import config
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+import mediastore
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def uses_store(repo: Path) -> bool:
+    """Whether the project opted in, here or in the clone it came from."""
+    ignore = repo / ".gitignore"
+    return mediastore.opted_in(repo) or (
+        ignore.exists() and f"/{mediastore.LINK_NAME}" in ignore.read_text().splitlines()
+    )
+
+
+def missing(repo: Path) -> list[str]:
+    """Digests of objects the repo's tracked store links need but lack here."""
+    out = _git(repo, "ls-files", "-s", "-z", "--", "pics", "docs")
+    digests = set()
+    for entry in filter(None, out.split("\0")):
+        meta, _, rel = entry.partition("\t")
+        if meta.startswith("120"):
+            digest = mediastore.pointer_digest(repo / rel)
+            if digest and not mediastore.object_path(digest).exists():
+                digests.add(digest)
+    return sorted(digests)
+
+
+def fetch(source: str, digests: list[str]):
+    """Copy objects from the store at source into MEDIA_STORE_DIR."""
+    files = "".join(f"{d[:2]}/{d}\n" for d in digests)
+    subprocess.run(
+        [
+            "rsync", "--archive", "--files-from=-",
+            f"{source.rstrip('/')}/objects/", f"{mediastore.objects_dir()}/",
+        ],
+        input=files, text=True, check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("projects", nargs="*", help="Project directory names")
+    parser.add_argument(
+        "--all", action="store_true", help="Every git repo in PROJECTS_DIR using the store"
+    )
+    parser.add_argument("--from", dest="source", help="Store to copy missing objects from")
+    parser.add_argument("--dry-run", action="store_true", help="Only count missing objects")
+    args = parser.parse_args()
+
+    if not mediastore.enabled():
+        print("PRECEPT_MEDIA_STORE_DIR is not set", file=sys.stderr)
+        sys.exit(1)
+    if args.all:
+        repos = sorted(
+            p for p in config.PROJECTS_DIR.iterdir()
+            if (p / ".git").is_dir() and uses_store(p)
+        )
+    elif args.projects:
+        repos = [config.PROJECTS_DIR / name for name in args.projects]
+    else:
+        parser.error("name a project or pass --all")
+
+    failed = 0
+    for repo in repos:
+        if not (repo / ".git").is_dir():
+            print(f"{repo.name}: not a git repository, skipped", file=sys.stderr)
+            continue
+        try:
+            if not args.dry_run:
+                mediastore.enable(repo)
+            digests = missing(repo)
+            if digests and args.source and not args.dry_run:
+                fetch(args.source, digests)
+                digests = missing(repo)
+        except subprocess.CalledProcessError as exc:
+            print(f"{repo.name}: {exc.cmd[0]} failed", file=sys.stderr)
+            failed += 1
+            continue
+        if digests:
+            failed += 1
+            print(f"{repo.name}: {len(digests)} object(s) missing from {config.MEDIA_STORE_DIR}")
+        else:
+            print(f"{repo.name}: all media present")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Content-addressed storage for captured media, outside git.
+
+Photos and large documents make project repositories slow to clone, status
+and repack. A captured file is moved to
+MEDIA_STORE_DIR/objects/<sha256[:2]>/<sha256> and replaced in the working
+tree by a symlink to it, so git only tracks the link (a few dozen bytes).
+Identical files share one object. Objects are made read-only so nothing
+edits them through a link.
+
+Each repository opts in separately (media-migrate.py PROJECT). Opting in
+creates an untracked .media link at the repository root pointing at
+MEDIA_STORE_DIR/objects, and the committed links are relative
+(pics/x.jpg -> ../.media/ab/ab12...), so they resolve in any clone that
+has its own .media link and the objects. media-sync.py sets up that link
+and copies missing objects in a clone elsewhere.
+
+Back the store up with the project repos: the links are useless without it.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import config
+
+logger = logging.getLogger("precept-bot.mediastore")
+
+CHUNK_BYTES = 1024 * 1024
+# Untracked link at the root of an opted-in repo: <repo>/.media -> objects/
+LINK_NAME = ".media"
+
+
+def enabled() -> bool:
+    return config.MEDIA_STORE_DIR is not None
+
+
+def opted_in(project_dir: Path) -> bool:
+    """Whether project_dir keeps its media in the store (has a .media link)."""
+    return (project_dir / LINK_NAME).is_symlink()
+
+
+def should_store(path: Path, project_dir: Path) -> bool:
+    """Whether a capture at path goes to the store rather than into git."""
+    return enabled() and opted_in(project_dir) and belongs_in_store(path, project_dir)
+
+
+def belongs_in_store(path: Path, project_dir: Path) -> bool:
+    """Whether path is media the store takes (pics/, or large under docs/)."""
+    if path.is_symlink() or not path.is_file():
+        return False
+    parts = path.relative_to(project_dir).parts
+    if parts[0] == "pics":
+        return True
+    return parts[0] == "docs" and path.stat().st_size >= config.MEDIA_STORE_MIN_BYTES
+
+
+def objects_dir() -> Path:
+    return config.MEDIA_STORE_DIR / "objects"
+
+
+def object_path(digest: str) -> Path:
+    return objects_dir() / digest[:2] / digest
+
+
+def pointer_target(path: Path, project_dir: Path, digest: str) -> str:
+    """The relative link text for a pointer at path to object digest."""
+    rel = Path(LINK_NAME, digest[:2], digest)
+    return os.path.relpath(project_dir / rel, path.parent)
+
+
+def pointer_digest(path: Path) -> str | None:
+    """The object a store link at path refers to, or None if it is not one.
+
+    Links written before per-repo opt-in point at the object by absolute
+    path; both forms are recognised.
+    """
+    if not path.is_symlink():
+        return None
+    target = Path(os.readlink(path))
+    digest = target.name
+    if len(digest) != 64 or target.parent.name != digest[:2]:
+        return None
+    if target.is_absolute() or target.parent.parent.name == LINK_NAME:
+        return digest
+    return None
+
+
+def enable(project_dir: Path):
+    """Opt project_dir in: link .media to the store and keep it untracked."""
+    objects_dir().mkdir(parents=True, exist_ok=True)
+    link = project_dir / LINK_NAME
+    if link.is_symlink() and Path(os.readlink(link)) != objects_dir():
+        link.unlink()
+    if not link.is_symlink():
+        link.symlink_to(objects_dir(), target_is_directory=True)
+    ignore = project_dir / ".gitignore"
+    entry = f"/{LINK_NAME}"
+    text = ignore.read_text() if ignore.exists() else ""
+    if entry not in text.splitlines():
+        if text and not text.endswith("\n"):
+            text += "\n"
+        ignore.write_text(f"{text}{entry}\n")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_BYTES):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def store(path: Path, project_dir: Path) -> Path:
+    """Move path into the store and leave a relative link in its place
+    (blocking).
+
+    Returns the object path.
+    """
+    digest = _sha256(path)
+    obj = object_path(digest)
+    if obj.exists():
+        path.unlink()
+    else:
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        # Land under a temporary name first (the move is a copy across
+        # filesystems) so a crash never leaves a truncated object behind
+        # its final name
+        tmp = obj.with_name(f".{digest}.tmp")
+        shutil.move(path, tmp)
+        tmp.chmod(0o444)
+        os.replace(tmp, obj)
+    path.symlink_to(pointer_target(path, project_dir, digest))
+    logger.debug("Stored %s as %s", path.name, digest[:12])
+    return obj
+
+
+def unlink_pointer(path: Path):
+    """Remove path if it is a store link, so a new download never writes
+    through it into a shared, read-only object."""
+    if path.is_symlink():
+        path.unlink()
@@ -40,6 +40,8 @@ VISIT_END_CONFIRM = f"{VISIT_CB}end_confirm"
 TASK_FINISH = f"{TASK_CB}finish"
 
 PROJECTS_PER_PAGE = 6
+# Candidates offered when a typed project name is ambiguous or misspelt
+PROJECT_MATCHES = 5
 
 
 # ---------------------------------------------------------------------------
@@ -76,7 +78,8 @@ def project_list_keyboard(
 ) -> InlineKeyboardMarkup:
     """Build a paginated project selection keyboard.
 
-    Most-recently-used (active) project is shown first.
+    projects arrive in picker order (catalog.ranked(), most used first);
+    the active project is moved to the front.
     """
     # Put active project first if it exists
     if active_project and active_project in projects:
@@ -116,6 +119,15 @@ def project_list_keyboard(
     return InlineKeyboardMarkup(rows)
 
 
+def project_choice_keyboard(projects: list[str]) -> InlineKeyboardMarkup:
+    """Ranked candidates for a typed project name, one per row."""
+    rows = [
+        [InlineKeyboardButton(p, callback_data=f"{PROJECT_CB}{p}")] for p in projects
+    ]
+    rows.append([InlineKeyboardButton("<< Back", callback_data=MENU_MAIN)])
+    return InlineKeyboardMarkup(rows)
+
+
 def visit_confirm_keyboard(project: str) -> InlineKeyboardMarkup:
     """Confirm starting a visit for the active project."""
     return InlineKeyboardMarkup(
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Check that no query in db.py falls back to a full table scan.
+
+Collects every SQL statement passed to execute()/executemany() in db.py,
+builds a scratch database from MIGRATIONS (with scratch event archives
+attached), and runs EXPLAIN QUERY PLAN on each SELECT/UPDATE/DELETE and
+INSERT ... SELECT:
+    python3 query-plan-audit.py [-v]
+
+f-string statements are planned with the interpolated expressions replaced
+by SAMPLES. Statements that cannot be rendered are listed as "not audited"
+(unless exempted in NOT_AUDITED, shown with -v).
+
+Exits 1 if any plan contains a bare "SCAN <table>" (no index) on a table
+not listed in ALLOWED_SCANS, outside the functions in EXPECTED_SCANS.
+"""
+
+import ast
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).parent
+sys.path.insert(0, str(HERE))
+
+# Tables small enough that a full scan is expected
+ALLOWED_SCANS = {"schema_version", "sqlite_master", "project_usage"}
+
+_EVENT_COLS = "id, event_type, detail, project, created_at, created_ts"
+_EVENT_RANGE = "created_ts >= ? AND created_ts < ? AND project = ?"
+
+# Text substituted for expressions interpolated into f-string queries,
+# keyed by expression or by (function, expression) where a name means
+# different SQL in different functions
+SAMPLES = {
+    "where": _EVENT_RANGE,
+    "order": " ORDER BY created_ts DESC LIMIT 10",
+    "schema": "arc0",
+    "cols": _EVENT_COLS,
+    ("events_between", "union"): " UNION ALL ".join(
+        f"SELECT {_EVENT_COLS} FROM {schema}.bot_events WHERE {_EVENT_RANGE}"
+        for schema in ("arc0", "arc1")
+    ),
+    ("count_events_between", "union"): " UNION ALL ".join(
+        f"SELECT COUNT(*) AS n FROM {schema}.bot_events WHERE {_EVENT_RANGE}"
+        for schema in ("arc0", "arc1")
+    ),
+}
+
+# Scratch archive files attached while planning, under the schema names
+# archive_events() and events_between() use
+ARCHIVE_SCHEMAS = ("arc", "arc0", "arc1")
+
+# Functions whose execute() calls are not audited on purpose, and why
+NOT_AUDITED = {
+    "execute": "_TimedConnection forwards the caller's statement",
+    "executemany": "_TimedConnection forwards the caller's statements",
+    "_record_timing": "plans the slow statement it was given",
+    "rebuild_counters": "full recomputation from REBUILD_COUNTERS_SQL; scans by design",
+    "_ensure_archive_table": "copies the hot table's CREATE TABLE statement",
+}
+
+# Functions whose planned statements touch every row on purpose, and why
+EXPECTED_SCANS = {
+    "_ensure_archive_table": "one-off created_ts backfill of an older archive",
+}
+
+AUDITED_VERBS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self):
+        self.function = None
+        self.queries: list[tuple[int, str, str]] = []  # (line, function, sql)
+        self.skipped: list[tuple[int, str]] = []  # (line, reason)
+
+    def visit_FunctionDef(self, node):
+        outer, self.function = self.function, node.name
+        self.generic_visit(node)
+        self.function = outer
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if not (
+            isinstance(node.func, ast.Attribute)
+            and node.func.attr in ("execute", "executemany")
+            and node.args
+        ):
+            return
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            sql, missing = arg.value, []
+        elif isinstance(arg, ast.JoinedStr):
+            sql, missing = self._render(arg)
+        else:
+            sql, missing = "", [ast.unparse(arg)]
+        sql = " ".join(sql.split())
+        verb = sql.split(" ", 1)[0].upper()
+        audited = verb in AUDITED_VERBS or (verb == "INSERT" and " SELECT " in sql.upper())
+        if missing and (audited or not sql):
+            if self.function in NOT_AUDITED:
+                reason = f"{self.function}: {NOT_AUDITED[self.function]}"
+            else:
+                reason = f"no sample for {', '.join(missing)} in {self.function}()"
+            self.skipped.append((node.lineno, reason))
+        elif audited:
+            self.queries.append((node.lineno, self.function, sql))
+
+    def _render(self, node: ast.JoinedStr) -> tuple[str, list[str]]:
+        parts, missing = [], []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+                continue
+            expr = ast.unparse(value.value)
+            sample = SAMPLES.get((self.function, expr), SAMPLES.get(expr))
+            if sample is None:
+                missing.append(expr)
+                sample = ""
+            parts.append(sample)
+        return "".join(parts), missing
+
+
+def collect_queries(source: Path):
+    """Return (line, function, sql) for each statement executed in a module,
+    and (line, reason) for each one that could not be rendered."""
+    collector = _Collector()
+    collector.visit(ast.parse(source.read_text()))
+    return sorted(collector.queries), sorted(collector.skipped)
+
+
+def placeholder_params(sql: str):
+    """Dummy bindings for a statement's ? or :name parameters."""
+    names = re.findall(r":(\w+)", sql)
+    if names:
+        return {name: 1 for name in names}
+    return (1,) * sql.count("?")
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Return plan lines that scan a real table without an index."""
+    bad = []
+    for detail in plan:
+        if not detail.startswith("SCAN "):
+            continue
+        if " USING " in detail or "VIRTUAL TABLE" in detail or detail == "SCAN CONSTANT ROW":
+            continue
+        target = detail.split(" ")[1].split(".")[-1]  # drop schema prefix
+        if target.startswith("(") or target in ALLOWED_SCANS:
+            continue
+        bad.append(detail)
+    return bad
+
+
+def main():
+    verbose = "-v" in sys.argv[1:]
+
+    # Point config at a scratch database before db.py is imported
+    tmpdir = tempfile.mkdtemp(prefix="precept-audit-")
+    os.environ["PRECEPT_DB_PATH"] = str(Path(tmpdir) / "audit.db")
+    import db
+
+    db.init_db()
+    conn = db._get_conn()
+    for schema in ARCHIVE_SCHEMAS:
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(Path(tmpdir) / f"{schema}.db"),))
+        db._ensure_archive_table(conn, schema)
+
+    failures = 0
+    queries, skipped = collect_queries(HERE / "db.py")
+    for lineno, function, sql in queries:
+        try:
+            rows = conn.execute(
+                f"EXPLAIN QUERY PLAN {sql}", placeholder_params(sql)
+            ).fetchall()
+        except sqlite3.Error as exc:
+            print(f"db.py:{lineno}: cannot plan query: {exc}\n  {sql}")
+            failures += 1
+            continue
+        plan = [row["detail"] for row in rows]
+        bad = [] if function in EXPECTED_SCANS else full_scans(plan)
+        if bad:
+            failures += 1
+            print(f"FAIL db.py:{lineno}: {sql}")
+        elif verbose:
+            print(f"ok   db.py:{lineno}: {sql}")
+        if bad or verbose:
+            for detail in plan:
+                print(f"       {detail}")
+
+    unexplained = 0
+    for lineno, reason in skipped:
+        exempt = reason.split(":", 1)[0] in NOT_AUDITED
+        unexplained += not exempt
+        if verbose or not exempt:
+            print(f"not audited db.py:{lineno}: {reason}")
+
+    db.close_all()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    print(f"{len(queries)} queries checked, {failures} failed, {unexplained} not audited")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
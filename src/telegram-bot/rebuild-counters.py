@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Recompute the project_counters and visit_counters tables from scratch.
+
+The counters are normally kept current by triggers; run this after manual
+edits to the database or if /status numbers look wrong:
+    python3 rebuild-counters.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add the telegram-bot directory to path so we can import db and config
+sys.path.insert(0, str(Path(__file__).parent))
+
+import db
+
+
+def main():
+    db.configure("cli")
+    db.init_db()
+    db.rebuild_counters()
+    conn = db._get_conn()
+    projects = conn.execute("SELECT COUNT(*) FROM project_counters").fetchone()[0]
+    visits = conn.execute("SELECT COUNT(*) FROM visit_counters").fetchone()[0]
+    db.close_all()
+    print(f"Counters rebuilt: {projects} projects, {visits} visits")
+
+
+if __name__ == "__main__":
+    main()
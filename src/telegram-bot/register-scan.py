@@ -5,8 +5,13 @@ Called by precept-scan.sh on the laptop via SSH:
     python3 register-scan.py <project> <scan_type> <filepath> [raw_output]
 
 Can also read raw output from stdin if not provided as argument.
+
+Batch mode registers many scans in one transaction, one JSON object per
+line on stdin (keys: project, scan_type, filepath, optional raw_output):
+    python3 register-scan.py --batch < scans.jsonl
 """
 
+import re
 import sys
 from pathlib import Path
 
@@ -17,9 +22,83 @@ import config
 import db
 
 
+def resolve_scan(project: str, filepath: str) -> Path:
+    """Validate project and filepath; return the absolute scan path."""
+    if not re.match(r'^[a-zA-Z0-9_-]+$', project):
+        raise ValueError(f"Invalid project name: {project}")
+
+    # Validate filepath stays within project directory
+    project_dir = config.PROJECTS_DIR / project
+    file_path = (project_dir / filepath).resolve()
+    if not str(file_path).startswith(str(project_dir.resolve())):
+        raise ValueError("Path escape detected")
+    return file_path
+
+
+def read_output(file_path: Path) -> str | None:
+    """Read raw output from the scan file, if it is readable."""
+    if file_path.exists():
+        try:
+            return file_path.read_text()
+        except Exception:
+            pass
+    return None
+
+
+def run_batch(lines) -> int:
+    """Validate every JSONL record, then register them all at once."""
+    import json  # only batch mode needs it; keep single-scan startup lean
+
+    records = []
+    errors = []
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+            project, scan_type = rec["project"], rec["scan_type"]
+            file_path = resolve_scan(project, rec["filepath"])
+        except (ValueError, KeyError, TypeError) as exc:
+            errors.append(f"line {lineno}: {exc}")
+            continue
+        raw_output = rec.get("raw_output")
+        if not isinstance(scan_type, str):
+            errors.append(f"line {lineno}: scan_type must be a string")
+            continue
+        if raw_output is not None and not isinstance(raw_output, str):
+            errors.append(f"line {lineno}: raw_output must be a string")
+            continue
+        if raw_output is None:
+            raw_output = read_output(file_path)
+        records.append({
+            "project": project,
+            "scan_type": scan_type,
+            "filepath": str(file_path),
+            "raw_output": raw_output,
+        })
+
+    # All or nothing: a bad line means nothing is registered
+    if errors:
+        for err in errors:
+            print(err, file=sys.stderr)
+        return 1
+
+    db.configure("cli")
+    db.init_db()
+    ids = db.bulk_log_scans(records)
+    db.close_all()
+    for scan_id, rec in zip(ids, records):
+        print(f"Scan registered: id={scan_id}, project={rec['project']}, type={rec['scan_type']}")
+    return 0
+
+
 def main():
+    if sys.argv[1:] == ["--batch"]:
+        sys.exit(run_batch(sys.stdin))
+
     if len(sys.argv) < 4:
         print("Usage: register-scan.py <project> <scan_type> <filepath> [raw_output]", file=sys.stderr)
+        print("       register-scan.py --batch < scans.jsonl", file=sys.stderr)
         sys.exit(1)
 
     project = sys.argv[1]
@@ -27,28 +106,20 @@ def main():
     filepath = sys.argv[3]
     raw_output = sys.argv[4] if len(sys.argv) > 4 else None
 
-    # Validate project name
-    import re
-    if not re.match(r'^[a-zA-Z0-9_-]+$', project):
-        print(f"Invalid project name: {project}", file=sys.stderr)
-        sys.exit(1)
-
-    # Validate filepath stays within project directory
-    project_dir = config.PROJECTS_DIR / project
-    file_path = (project_dir / filepath).resolve()
-    if not str(file_path).startswith(str(project_dir.resolve())):
-        print("Path escape detected", file=sys.stderr)
+    try:
+        file_path = resolve_scan(project, filepath)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
         sys.exit(1)
 
     # Read raw output from file if not provided
-    if raw_output is None and file_path.exists():
-        try:
-            raw_output = file_path.read_text()
-        except Exception:
-            pass
+    if raw_output is None:
+        raw_output = read_output(file_path)
 
+    db.configure("cli")
     db.init_db()
     scan_id = db.log_scan(project, scan_type, str(file_path), raw_output)
+    db.close_all()
     print(f"Scan registered: id={scan_id}, project={project}, type={scan_type}")
 
 
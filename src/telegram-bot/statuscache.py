@@ -0,0 +1,49 @@
+"""LRU cache of rendered project status views.
+
+A status view is built from the project's STATUS.md and from DB counters,
+so each entry is stored with a key made of the file's identity (inode,
+mtime, size) and db.change_counter(). A lookup with a different key is a
+miss, which means a cached view is never shown after either source has
+changed.
+"""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+
+def file_key(path: Path) -> tuple | None:
+    """Identity of a file's current content, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class StatusCache:
+    """Rendered status text per project, least recently used evicted first."""
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[tuple, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project: str, key: tuple) -> str | None:
+        entry = self._entries.get(project)
+        if entry is None or entry[0] != key:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(project)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, project: str, key: tuple, text: str):
+        self._entries[project] = (key, text)
+        self._entries.move_to_end(project)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+status_cache = StatusCache()